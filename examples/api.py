@@ -1,30 +1,61 @@
 import itertools
 import os
 from collections import defaultdict
+from functools import cached_property
 
 from datacitekit.doi_relations import DoiRelationRelatonsReport
 from datacitekit.extractors import extract_doi
+from datacitekit.refresh import RefreshScheduler
 from datacitekit.related_works import get_full_corpus_doi_attributes
 from datacitekit.resource_type_graph import RelatedWorkReports
-from flask import Flask, jsonify
+from flask import Flask, jsonify, request
 
 DOI_API = os.getenv("DOI_API", "https://api.stage.datacite.org/dois/")
 app = Flask(__name__)
 
 
+class CachedCorpus:
+    """The corpus of a DOI and its reports, built once per cache refresh."""
+
+    def __init__(self, doi, corpus):
+        self.doi = doi
+        self.corpus = corpus
+
+    @cached_property
+    def related_work_reports(self):
+        return RelatedWorkReports(self.corpus)
+
+    @cached_property
+    def relation_view(self):
+        # Kept so that later pages of the connections reuse it
+        return DoiRelationRelatonsReport(self.corpus).relation_view(self.doi)
+
+
+def load_corpus(doi):
+    corpus = get_full_corpus_doi_attributes(doi, RelatedWorkReports.parser, DOI_API)
+    if not corpus:
+        # Raised rather than cached, so a DOI registered later is found
+        raise LookupError(f"DOI not found: {doi}")
+    return CachedCorpus(doi, corpus)
+
+
+# Serve popular DOIs from memory and rebuild them in the background
+corpus_cache = RefreshScheduler(load_corpus)
+corpus_cache.start()
+
+
 @app.route("/doi/related-graph/<path:doi>", methods=["GET"])
 def related_graph(doi):
     doi = extract_doi(doi)
     if not doi:
         return jsonify({"error": "Does not match DOI format"}), 400
 
-    full_doi_attributes = get_full_corpus_doi_attributes(
-        doi, RelatedWorkReports.parser, DOI_API
-    )
-    if not full_doi_attributes:
+    try:
+        cached = corpus_cache.get(doi)
+    except LookupError:
         return jsonify({"error": "DOI not found"}), 404
 
-    report = RelatedWorkReports(full_doi_attributes)
+    report = cached.related_work_reports
     return jsonify(
         {
             "nodes": report.aggregate_counts,
@@ -47,17 +78,27 @@ def connections(doi):
     if not doi:
         return jsonify({"error": "Does not match DOI format"}), 400
 
-    full_doi_attributes = get_full_corpus_doi_attributes(
-        doi, RelatedWorkReports.parser, DOI_API
-    )
-    if not full_doi_attributes:
+    limit = request.args.get("limit", type=int)
+    offset = request.args.get("offset", 0, type=int)
+    if offset < 0 or (limit is not None and limit < 0):
+        return jsonify({"error": "offset and limit must not be negative"}), 400
+
+    try:
+        view = corpus_cache.get(doi).relation_view
+    except LookupError:
         return jsonify({"error": "DOI not found"}), 404
 
-    report = DoiRelationRelatonsReport(full_doi_attributes)
-    relations = report.relations_to_doi(doi)
-    relation_counts = dict(
-        [(relation, len(values)) for relation, values in relations.items() if values]
-    )
+    relation_counts = view.counts()
+
+    # Pages of each relation type for DOIs with too many relations to list
+    if limit is not None:
+        relations = {
+            relation: view.slice(relation, offset, limit)
+            for relation in view.relation_types
+        }
+        return jsonify({"relations": relations, "counts": relation_counts})
+
+    relations = view.as_dict()
     all_relations = transpose_defaultdict(relations)
 
     return jsonify(
@@ -0,0 +1,70 @@
+"""Compare the python and numpy type-graph backends on a synthetic corpus.
+
+    python examples/benchmark_type_graph.py [records] [links per record]
+"""
+
+import random
+import sys
+import time
+
+from datacitekit.resource_type_graph import Aggregator, RelatedWorkReports
+
+RESOURCE_TYPES = ["JournalArticle", "Dataset", "Software", "Text", "Image", "Other"]
+
+
+def corpus(size, links, seed=1):
+    rng = random.Random(seed)
+    return {
+        f"10.1000/{number}": {
+            "resourceTypeGeneral": rng.choice(RESOURCE_TYPES),
+            "related_identifiers": [
+                {
+                    "relatedIdentifier": f"10.1000/{rng.randrange(size)}",
+                    "relationType": "Cites",
+                }
+                for _ in range(links)
+            ],
+        }
+        for number in range(size)
+    }
+
+
+def best_of(runs, function):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main(size=200_000, links=5, runs=3):
+    data = corpus(size, links)
+    print(f"{size} records, {size * links} links, best of {runs}")
+    reports = {}
+
+    def build(backend):
+        reports[backend] = RelatedWorkReports(data, backend)
+
+    for backend in Aggregator.BACKENDS:
+        report_seconds = best_of(runs, lambda: build(backend))
+        report = reports[backend]
+        # The aggregation step alone, from the connections and codes built above
+        aggregate_seconds = best_of(
+            runs,
+            lambda: Aggregator(
+                report.base_connections, backend, codes=report.aggregator.codes
+            ),
+        )
+        print(
+            f"{backend:>6}: report {report_seconds:.2f}s, "
+            f"aggregation {aggregate_seconds:.3f}s"
+        )
+    assert (
+        reports["python"].type_connection_report
+        == reports["numpy"].type_connection_report
+    )
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:3]))
@@ -0,0 +1,293 @@
+""" Batch command line interface, run with ``python -m datacitekit`` """
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from .doi_relations import DoiRelationRelatonsReport
+from .extractors import extract_doi
+from .related_works import get_full_corpus_doi_attributes
+from .resource_type_graph import RelatedWorkReports
+from .transport import HedgedTransport, RecordingTransport, ReplayTransport
+
+
+def iter_dois(lines):
+    """Yield the DOIs of a list, one per line, skipping blanks and comments."""
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith("#"):
+            yield line
+
+
+def build_reports(doi_query, api_url, **search_options):
+    """Build the relation and type-graph reports of one DOI."""
+    doi = extract_doi(doi_query)
+    if not doi:
+        raise ValueError("Does not match DOI format")
+    full_doi_attributes = get_full_corpus_doi_attributes(
+        doi, RelatedWorkReports.parser, api_url, **search_options
+    )
+    if not full_doi_attributes:
+        raise LookupError("DOI not found")
+
+    relations = DoiRelationRelatonsReport(full_doi_attributes).relations_to_doi(doi)
+    type_graph = RelatedWorkReports(full_doi_attributes)
+    reports = {
+        "doi": doi,
+        "relations": relations,
+        "counts": {relation: len(values) for relation, values in relations.items()},
+        "nodes": type_graph.aggregate_counts,
+        "edges": type_graph.type_connection_report,
+    }
+    if type_graph.completeness is not None:
+        reports["partial"] = type_graph.partial
+        reports["completeness"] = type_graph.completeness
+    return reports
+
+
+class Checkpoint:
+    """Append-only file of the DOIs that have been written to the output."""
+
+    def __init__(self, path):
+        self.path = path
+        self.done = set()
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as checkpoint:
+                self.done.update(iter_dois(checkpoint))
+        self._file = open(path, "a", encoding="utf-8") if path else None
+
+    def __contains__(self, doi):
+        return doi in self.done
+
+    def add(self, doi):
+        self.done.add(doi)
+        if self._file:
+            self._file.write(doi + "\n")
+            self._file.flush()
+
+    def close(self):
+        if self._file:
+            self._file.close()
+
+
+class BatchRun:
+    """Build reports for many DOIs in parallel and stream them as JSONL.
+
+    Every DOI is handled by one of ``workers`` threads; the searchers share
+    the process-wide rate limiter. Results are written as they complete and
+    recorded in the checkpoint, so an interrupted run started again with the
+    same checkpoint continues with the DOIs that are left. DOIs that failed
+    are written with an ``error`` to the separate ``errors`` stream and are
+    retried on the next run, so ``output`` holds one result per DOI even
+    across resumed runs.
+
+    Args:
+        output (file): Text file the JSONL results are written to
+        errors (file): Text file the JSONL errors are written to
+        workers (int): Number of DOIs processed at the same time
+        checkpoint (Checkpoint): DOIs already done
+        progress (file): Text file progress and the summary are written to
+        progress_interval (float): Seconds between progress lines
+        **report_options: Passed on to ``build_reports``
+    """
+
+    def __init__(
+        self,
+        output,
+        errors=sys.stderr,
+        workers=4,
+        checkpoint=None,
+        progress=sys.stderr,
+        progress_interval=10,
+        **report_options,
+    ):
+        self.output = output
+        self.error_output = errors
+        self.workers = workers
+        self.checkpoint = checkpoint or Checkpoint(None)
+        self.progress = progress
+        self.progress_interval = progress_interval
+        self.report_options = report_options
+        self.stats = Counter()
+        self.errors = Counter()
+        self.started = None
+        self._last_progress = None
+
+    def _process(self, doi):
+        try:
+            return build_reports(doi, **self.report_options)
+        except Exception as error:
+            return {"doi": doi, "error": f"{type(error).__name__}: {error}"}
+
+    def _write(self, doi, result):
+        stream = self.error_output if "error" in result else self.output
+        stream.write(json.dumps(result) + "\n")
+        stream.flush()
+        if "error" in result:
+            self.stats["errors"] += 1
+            self.errors[result["error"].split(":")[0]] += 1
+        else:
+            self.stats["done"] += 1
+            self.checkpoint.add(doi)
+        now = time.monotonic()
+        if now - self._last_progress >= self.progress_interval:
+            self._last_progress = now
+            self._report("progress")
+
+    def _report(self, label):
+        elapsed = time.monotonic() - self.started
+        handled = self.stats["done"] + self.stats["errors"]
+        rate = handled / elapsed if elapsed else 0.0
+        print(
+            f"{label}: {self.stats['done']} done, {self.stats['errors']} errors, "
+            f"{self.stats['skipped']} skipped in {elapsed:.1f}s ({rate:.2f} DOIs/s)",
+            file=self.progress,
+        )
+
+    def run(self, dois):
+        self.started = self._last_progress = time.monotonic()
+        scheduled = set()
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            pending = {}
+            for doi in dois:
+                if doi in self.checkpoint or doi in scheduled:
+                    self.stats["skipped"] += 1
+                    continue
+                scheduled.add(doi)
+                pending[executor.submit(self._process, doi)] = doi
+                # Keep a bounded window of DOIs in flight
+                if len(pending) >= 2 * self.workers:
+                    finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        self._write(pending.pop(future), future.result())
+            for future in list(pending):
+                self._write(pending.pop(future), future.result())
+        self._report("summary")
+        for error, count in self.errors.most_common():
+            print(f"  {error}: {count}", file=self.progress)
+        return self.stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m datacitekit",
+        description="Build relation and type-graph reports for a list of DOIs.",
+    )
+    parser.add_argument(
+        "input",
+        nargs="?",
+        default="-",
+        help="file with one DOI per line, stdin by default",
+    )
+    parser.add_argument(
+        "-o", "--output", default="-", help="JSONL output file, stdout by default"
+    )
+    parser.add_argument(
+        "-e",
+        "--errors",
+        default="-",
+        help="JSONL file for the DOIs that failed, stderr by default",
+    )
+    parser.add_argument(
+        "-w", "--workers", type=int, default=4, help="DOIs processed in parallel"
+    )
+    parser.add_argument(
+        "-c", "--checkpoint", help="file of finished DOIs, used to resume a run"
+    )
+    parser.add_argument(
+        "--api-url",
+        default=os.getenv("DOI_API", "https://api.stage.datacite.org/dois/"),
+        help="DataCite API to query",
+    )
+    parser.add_argument(
+        "--local-store", help="answer searches from a LocalStore sqlite file"
+    )
+    parser.add_argument(
+        "--record", help="append the API traffic to a gzipped JSONL archive"
+    )
+    parser.add_argument(
+        "--replay", help="answer searches from an archive written by --record"
+    )
+    parser.add_argument(
+        "--replay-latency",
+        type=float,
+        default=0.0,
+        help="fraction of the recorded latencies waited for when replaying",
+    )
+    parser.add_argument(
+        "--time-budget",
+        type=float,
+        help="seconds per DOI after which partial reports are written",
+    )
+    parser.add_argument(
+        "--hedge",
+        action="store_true",
+        help="send a second copy of unusually slow requests",
+    )
+    parser.add_argument(
+        "--progress-interval",
+        type=float,
+        default=10,
+        help="seconds between progress lines on stderr",
+    )
+    args = parser.parse_args(argv)
+
+    report_options = {"api_url": args.api_url}
+    if args.time_budget is not None:
+        report_options["deadline"] = args.time_budget
+    if args.local_store:
+        from .local_store import LocalStore
+
+        report_options["local_store"] = LocalStore(args.local_store)
+    transport = None
+    if args.replay:
+        transport = ReplayTransport(args.replay, args.replay_latency)
+    elif args.record:
+        transport = RecordingTransport(args.record)
+    if args.hedge:
+        # Hedges take their slots and tokens from the searchers' rate limiter
+        transport = HedgedTransport(transport)
+    if transport is not None:
+        report_options["transport"] = transport
+
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    # Append when resuming so earlier results are kept
+    output_mode = "a" if args.checkpoint else "w"
+    output = (
+        sys.stdout
+        if args.output == "-"
+        else open(args.output, output_mode, encoding="utf-8")
+    )
+    errors = (
+        sys.stderr
+        if args.errors == "-"
+        else open(args.errors, output_mode, encoding="utf-8")
+    )
+    checkpoint = Checkpoint(args.checkpoint)
+    try:
+        stats = BatchRun(
+            output,
+            errors=errors,
+            workers=args.workers,
+            checkpoint=checkpoint,
+            progress_interval=args.progress_interval,
+            **report_options,
+        ).run(iter_dois(source))
+        if args.hedge:
+            print(
+                f"hedged {transport.stats['hedged']} of "
+                f"{transport.stats['requests']} requests "
+                f"({transport.hedge_rate:.1%}), {transport.stats['hedge_wins']} won",
+                file=sys.stderr,
+            )
+    finally:
+        checkpoint.close()
+        if transport is not None:
+            transport.close()
+        for stream in (source, output, errors):
+            if stream not in (sys.stdin, sys.stdout, sys.stderr):
+                stream.close()
+    return 1 if stats["errors"] else 0
@@ -0,0 +1,133 @@
+import hashlib
+import math
+
+
+def identifier_hash(identifier):
+    """64-bit hash of an identifier, the value ``HyperLogLog`` counts."""
+    digest = hashlib.blake2b(identifier.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+class IdentifierInterner:
+    """Map identifier strings to dense integer ids, storing each string once."""
+
+    def __init__(self):
+        self._ids = {}
+
+    def __len__(self):
+        return len(self._ids)
+
+    def intern(self, identifier):
+        return self._ids.setdefault(identifier, len(self._ids))
+
+    def intern_all(self, identifiers):
+        return [self.intern(identifier) for identifier in identifiers]
+
+
+class IdSet:
+    """Set of small non-negative integers stored as a bitmap.
+
+    Uses one bit per possible id, which for dense interned ids is far smaller
+    than a ``set`` of int objects.
+    """
+
+    def __init__(self, ids=()):
+        self._bits = bytearray()
+        self._count = 0
+        self.update(ids)
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, id_):
+        byte, bit = divmod(id_, 8)
+        return byte < len(self._bits) and bool(self._bits[byte] & (1 << bit))
+
+    def __iter__(self):
+        for byte_index, byte in enumerate(self._bits):
+            while byte:
+                low_bit = byte & -byte
+                yield byte_index * 8 + low_bit.bit_length() - 1
+                byte ^= low_bit
+
+    def add(self, id_):
+        byte, bit = divmod(id_, 8)
+        if byte >= len(self._bits):
+            # Grow geometrically so that adding ids in order stays linear
+            self._bits.extend(bytes(max(byte + 1 - len(self._bits), len(self._bits))))
+        mask = 1 << bit
+        if not self._bits[byte] & mask:
+            self._bits[byte] |= mask
+            self._count += 1
+
+    def update(self, ids):
+        for id_ in ids:
+            self.add(id_)
+
+    def merge(self, other):
+        """Add every id of ``other`` to this set."""
+        size = max(len(self._bits), len(other._bits))
+        merged = int.from_bytes(self._bits, "little") | int.from_bytes(
+            other._bits, "little"
+        )
+        self._bits = bytearray(merged.to_bytes(size, "little"))
+        self._count = merged.bit_count()
+
+
+class HyperLogLog:
+    """Approximate distinct counter with a fixed memory bound.
+
+    Keeps ``2 ** precision`` one byte registers, 16 KiB at the default
+    precision, for a typical relative error of ``1.04 / sqrt(2 ** precision)``
+    (about 0.8%).
+
+    Args:
+        precision (int): Number of hash bits used to select a register, 4-16
+    """
+
+    def __init__(self, precision=14):
+        if not 4 <= precision <= 16:
+            raise ValueError("HyperLogLog precision must be between 4 and 16")
+        self.precision = precision
+        self._registers = bytearray(1 << precision)
+
+    def add(self, identifier):
+        self.add_hash(identifier_hash(identifier))
+
+    def add_hash(self, value):
+        """Count an identifier by its ``identifier_hash``."""
+        index = value >> (64 - self.precision)
+        remaining_bits = 64 - self.precision
+        remainder = value & ((1 << remaining_bits) - 1)
+        rank = remaining_bits - remainder.bit_length() + 1
+        if rank > self._registers[index]:
+            self._registers[index] = rank
+
+    def update(self, identifiers):
+        for identifier in identifiers:
+            self.add(identifier)
+
+    def update_hashes(self, values):
+        for value in values:
+            self.add_hash(value)
+
+    def merge(self, other):
+        """Fold the registers of ``other`` into this counter."""
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLogs of different precision")
+        self._registers = bytearray(map(max, self._registers, other._registers))
+
+    def __len__(self):
+        return round(self.estimate())
+
+    def estimate(self):
+        registers = len(self._registers)
+        alpha = {16: 0.673, 32: 0.697, 64: 0.709}.get(
+            registers, 0.7213 / (1 + 1.079 / registers)
+        )
+        raw = alpha * registers**2 / sum(2.0**-rank for rank in self._registers)
+        empty = self._registers.count(0)
+        if raw <= 2.5 * registers and empty:
+            # Linear counting is more accurate for small cardinalities
+            return registers * math.log(registers / empty)
+        return raw
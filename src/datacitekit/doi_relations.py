@@ -1,5 +1,15 @@
+import heapq
+from array import array
+from collections import Counter, namedtuple
+from functools import lru_cache
+
 from .extractors import extract_doi
-from .utils import camel_to_hyphen_case, group_by, merge_list_dicts
+from .utils import camel_to_hyphen_case, corpus_status
+
+RelationDispatch = namedtuple(
+    "RelationDispatch",
+    ["source_relation_type_id", "target_relation_type_id", "subject_is_source"],
+)
 
 
 class DoiRelationRelatonsReport:
@@ -99,16 +109,27 @@ class DoiRelationRelatonsReport:
         "is-translation-of": ("is_translation_of", "translations"),
     }
 
-    def __init__(self, data):
+    def __init__(self, data, connections=None, source_target_format=None):
         """
         Initialize with connection data.
 
         Args:
-            connections: List of DOI connection data
+            data: DOI attributes keyed by DOI
+            connections: List of DOI connection data, built from ``data``
+                when not given
+            source_target_format: Connections already converted to
+                source-target format, converted on first use when not given
         """
         self.data = data
-        self.connections = self._base_connections()
-        self._source_target_format = None
+        if connections is None:
+            connections = self._base_connections()
+        self.connections = connections
+        self._source_target_format = source_target_format
+        self._relation_views = {}
+        # Edges skipped while converting to source-target format
+        self.warning_counts = Counter()
+        self.unhandled_relation_types = Counter()
+        self.partial, self.completeness = corpus_status(data)
 
     def _base_connections(self):
         dois = self.data.keys()
@@ -132,8 +153,7 @@ class DoiRelationRelatonsReport:
             )
         return report
 
-    @staticmethod
-    def _set_source_and_target_doi(subj_id, obj_id, relation_type_id):
+    def _set_source_and_target_doi(self, subj_id, obj_id, relation_type_id):
         """
         Determines source and target DOIs and relation types based on the input IDs and relation type.
 
@@ -145,36 +165,18 @@ class DoiRelationRelatonsReport:
         Returns:
             A dictionary containing the source DOI, target DOI, source relation type, and target relation type,
             or None if there are missing IDs or an unhandled relation type
+
+        Skipped edges are counted in ``warning_counts``.
         """
         if not subj_id or not obj_id:
-            print(f"Warning: Missing ID - subject: {subj_id}, object: {obj_id}")
+            self.warning_counts["missing_id"] += 1
             return None
-
-        result = {
-            "source_doi": None,
-            "target_doi": None,
-            "source_relation_type_id": None,
-            "target_relation_type_id": None,
-        }
-
-        if relation_type_id in DoiRelationRelatonsReport.RELATION_MAPPING:
-            source_rel, target_rel = DoiRelationRelatonsReport.RELATION_MAPPING[
-                relation_type_id
-            ]
-            # Relations where the subject is the source
-            if relation_type_id in DoiRelationRelatonsReport.SUBJECT_SOURCE_RELATIONS:
-                result["source_doi"] = subj_id
-                result["target_doi"] = obj_id
-            else:  # Relations where the object is the source
-                result["source_doi"] = obj_id
-                result["target_doi"] = subj_id
-            result["source_relation_type_id"] = source_rel
-            result["target_relation_type_id"] = target_rel
-        else:
-            print(f"Warning: Unhandled relation type: {relation_type_id}")
+        dispatch = relation_dispatch(relation_type_id)
+        if dispatch is None:
+            self.warning_counts["unhandled_relation_type"] += 1
+            self.unhandled_relation_types[relation_type_id] += 1
             return None
-
-        return result
+        return _source_target_pair(subj_id, obj_id, dispatch)
 
     @property
     def source_target_format(self):
@@ -199,15 +201,43 @@ class DoiRelationRelatonsReport:
         for item in self.connections:
             source = item["doi"]
             for connection in item["connections"]:
-                target = connection["related_doi"]
-                relationship_type = camel_to_hyphen_case(connection["relation_type"])
                 result = self._set_source_and_target_doi(
-                    source, target, relationship_type
+                    source, connection["related_doi"], connection["relation_type"]
                 )
                 if result is not None:
                     converted.append(result)
         return converted
 
+    def relation_view(self, doi):
+        """
+        Get a lazy view of the relations of a specific DOI.
+
+        Views are built with one pass over the source-target format that
+        only collects the positions of the DOI's pairs, and kept for later
+        calls.
+
+        Args:
+            doi: The DOI to get relations for
+
+        Returns:
+            A RelationView over the related DOIs of every relation type
+        """
+        view = self._relation_views.get(doi)
+        if view is None:
+            as_source, as_target = {}, {}
+            for position, stpair in enumerate(self.source_target_format):
+                if stpair["source_doi"] == doi:
+                    as_source.setdefault(
+                        stpair["source_relation_type_id"], array("L")
+                    ).append(position)
+                if stpair["target_doi"] == doi:
+                    as_target.setdefault(
+                        stpair["target_relation_type_id"], array("L")
+                    ).append(position)
+            view = RelationView(self.source_target_format, as_source, as_target)
+            self._relation_views[doi] = view
+        return view
+
     def relations_to_doi(self, doi):
         """
         Get all relations for a specific DOI.
@@ -218,25 +248,163 @@ class DoiRelationRelatonsReport:
         Returns:
             A dictionary mapping relation types to lists of related DOIs
         """
-        s_with_doi = (
-            stpair
-            for stpair in self.source_target_format
-            if stpair["source_doi"] == doi
-        )
-        t_with_doi = (
-            stpair
-            for stpair in self.source_target_format
-            if stpair["target_doi"] == doi
+        return self.relation_view(doi).as_dict()
+
+
+class RelationView:
+    """
+    Related DOIs of one DOI, grouped by relation type, built on demand.
+
+    Only the positions of the DOI's pairs in the source-target format are
+    held, so counts are known without building any list, and slices, top-k
+    selections and iteration only look at the pairs they return. Relation
+    types and related DOIs are in the order of ``relations_to_doi``: pairs
+    where the DOI is the source first, then pairs where it is the target.
+    """
+
+    def __init__(self, source_target_format, as_source, as_target):
+        """
+        Args:
+            source_target_format: List of source-target pairs
+            as_source: Relation type to positions of the pairs where the DOI
+                is the source
+            as_target: Relation type to positions of the pairs where the DOI
+                is the target
+        """
+        self._pairs = source_target_format
+        self._as_source = as_source
+        self._as_target = as_target
+
+    @property
+    def relation_types(self):
+        return list(dict.fromkeys([*self._as_source, *self._as_target]))
+
+    def count(self, relation_type):
+        return len(self._as_source.get(relation_type, ())) + len(
+            self._as_target.get(relation_type, ())
         )
 
-        sources_grouped = group_by(s_with_doi, "source_relation_type_id")
-        source_group_dois = dict(
-            [(k, [d["target_doi"] for d in v]) for k, v in sources_grouped.items()]
+    def counts(self):
+        """Number of related DOIs for each relation type."""
+        return {
+            relation_type: self.count(relation_type)
+            for relation_type in self.relation_types
+        }
+
+    def _related_dois(self, positions, offset, stop, side):
+        return [self._pairs[position][side] for position in positions[offset:stop]]
+
+    def slice(self, relation_type, offset=0, limit=None):
+        """
+        Get a page of the related DOIs of one relation type.
+
+        Args:
+            relation_type: The relation type, e.g. "citations"
+            offset: Number of related DOIs to skip
+            limit: Maximum number of related DOIs returned, all by default
+
+        Returns:
+            List of related DOIs
+
+        Raises:
+            ValueError: If offset or limit is negative
+        """
+        if offset < 0 or (limit is not None and limit < 0):
+            raise ValueError("offset and limit must not be negative")
+        as_source = self._as_source.get(relation_type, ())
+        as_target = self._as_target.get(relation_type, ())
+        stop = None if limit is None else offset + limit
+        related = self._related_dois(as_source, offset, stop, "target_doi")
+        skipped = len(as_source)
+        return related + self._related_dois(
+            as_target,
+            max(offset - skipped, 0),
+            None if stop is None else max(stop - skipped, 0),
+            "source_doi",
         )
 
-        targets_grouped = group_by(t_with_doi, "target_relation_type_id")
-        target_group_dois = dict(
-            [(k, [d["source_doi"] for d in v]) for k, v in targets_grouped.items()]
+    def iter(self, relation_type):
+        """Yield the related DOIs of one relation type."""
+        for position in self._as_source.get(relation_type, ()):
+            yield self._pairs[position]["target_doi"]
+        for position in self._as_target.get(relation_type, ()):
+            yield self._pairs[position]["source_doi"]
+
+    def top(self, relation_type, k, key=None):
+        """
+        Get the first ``k`` related DOIs of one relation type in sorted order.
+
+        Args:
+            relation_type: The relation type, e.g. "citations"
+            k: Number of related DOIs returned
+            key: Sort key called with each related DOI, the DOI by default
+
+        Returns:
+            List of at most ``k`` related DOIs, smallest key first
+        """
+        return heapq.nsmallest(k, self.iter(relation_type), key=key)
+
+    def as_dict(self):
+        """All relations, in the format of ``relations_to_doi``."""
+        return {
+            relation_type: list(self.iter(relation_type))
+            for relation_type in self.relation_types
+        }
+
+
+def _source_target_pair(subj_id, obj_id, dispatch):
+    if dispatch.subject_is_source:
+        source_doi, target_doi = subj_id, obj_id
+    else:  # Relations where the object is the source
+        source_doi, target_doi = obj_id, subj_id
+    return {
+        "source_doi": source_doi,
+        "target_doi": target_doi,
+        "source_relation_type_id": dispatch.source_relation_type_id,
+        "target_relation_type_id": dispatch.target_relation_type_id,
+    }
+
+
+def _hyphen_to_camel_case(hyphen_case_str):
+    return "".join(term.capitalize() for term in hyphen_case_str.split("-"))
+
+
+def _build_relation_dispatch():
+    dispatch = {}
+    mapping = DoiRelationRelatonsReport.RELATION_MAPPING
+    subject_source = DoiRelationRelatonsReport.SUBJECT_SOURCE_RELATIONS
+    for relation_type_id, (source_rel, target_rel) in mapping.items():
+        entry = RelationDispatch(
+            source_rel, target_rel, relation_type_id in subject_source
         )
+        # Accept both the raw DataCite relationType and its hyphen-case form
+        dispatch[_hyphen_to_camel_case(relation_type_id)] = entry
+        dispatch[relation_type_id] = entry
+    return dispatch
+
 
-        return merge_list_dicts(source_group_dois, target_group_dois)
+RELATION_DISPATCH = _build_relation_dispatch()
+
+
+@lru_cache(maxsize=None)
+def _normalised_relation_dispatch(relation_type):
+    return RELATION_DISPATCH.get(camel_to_hyphen_case(relation_type))
+
+
+def relation_dispatch(relation_type):
+    """Look up how a relationType maps to source-target format.
+
+    Known DataCite values are answered from a table built at import time,
+    anything else is normalised once and memoised.
+
+    Args:
+        relation_type (str): Raw relationType, e.g. "IsCitedBy"
+
+    Returns:
+        RelationDispatch: Source and target relation types and whether the
+            subject is the source, or None for an unhandled relation type
+    """
+    dispatch = RELATION_DISPATCH.get(relation_type)
+    if dispatch is None and relation_type:
+        dispatch = _normalised_relation_dispatch(relation_type)
+    return dispatch
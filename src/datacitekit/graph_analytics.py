@@ -0,0 +1,269 @@
+from itertools import chain, repeat
+from operator import itemgetter
+
+from .type_graph_numpy import _require_numpy
+
+# Relation types from DoiRelationRelatonsReport.RELATION_MAPPING grouped into
+# the buckets the analytics are split by. Edges always point from the
+# source DOI to the target DOI of the source-target format.
+RELATION_BUCKETS = {
+    "citations": ("references", "citations"),
+    "versions": ("versions", "version_of", "new_versions", "previous_versions"),
+    "parts": ("parts", "part_of"),
+}
+
+
+def _sorted_unique(values):
+    np = _require_numpy()
+    values = np.sort(values)
+    if len(values):
+        values = values[np.concatenate(([True], values[1:] != values[:-1]))]
+    return values
+
+
+class CsrAdjacency:
+    """Directed adjacency in compressed sparse row form.
+
+    Args:
+        indptr (numpy.ndarray): Row offsets, of length ``size + 1``
+        indices (numpy.ndarray): Column indices of every edge, grouped by row
+        size (int): Number of nodes
+    """
+
+    def __init__(self, indptr, indices, size):
+        self.indptr = indptr
+        self.indices = indices
+        self.size = size
+        self._transposed = None
+
+    @classmethod
+    def from_edges(cls, sources, targets, size):
+        np = _require_numpy()
+        order = np.argsort(sources, kind="stable")
+        indptr = np.zeros(size + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=size), out=indptr[1:])
+        return cls(indptr, targets[order], size)
+
+    @property
+    def sources(self):
+        np = _require_numpy()
+        return np.repeat(np.arange(self.size, dtype=np.int64), np.diff(self.indptr))
+
+    def transpose(self):
+        if self._transposed is None:
+            self._transposed = CsrAdjacency.from_edges(
+                self.indices, self.sources, self.size
+            )
+            self._transposed._transposed = self
+        return self._transposed
+
+    def neighbours(self, nodes):
+        """Concatenated neighbours of ``nodes``, gathered without a Python loop."""
+        np = _require_numpy()
+        starts = self.indptr[nodes]
+        lengths = self.indptr[nodes + 1] - starts
+        total = int(lengths.sum())
+        if not total:
+            return np.empty(0, dtype=np.int64)
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        return self.indices[offsets + np.arange(total)]
+
+
+class RelationGraph:
+    """Vectorised analytics over the edges of a ``DoiRelationRelatonsReport``.
+
+    Every DOI is encoded as an integer node and the edges of each relation
+    bucket are kept as a separate CSR adjacency. Methods returning one value
+    per node return a NumPy array aligned with ``dois``; use ``as_dict`` to
+    key it by DOI.
+
+    Args:
+        source_target_format (list): Edges as produced by
+            ``DoiRelationRelatonsReport.source_target_format``
+        dois (iterable): DOIs to include as nodes even without edges
+        buckets (dict): Bucket names mapped to the relation types they contain
+    """
+
+    def __init__(self, source_target_format, dois=(), buckets=RELATION_BUCKETS):
+        np = _require_numpy()
+        source_target_format = list(source_target_format)
+        source_dois = list(map(itemgetter("source_doi"), source_target_format))
+        target_dois = list(map(itemgetter("target_doi"), source_target_format))
+        self.dois = list(dict.fromkeys(chain(dois, source_dois, target_dois)))
+        self.doi_index = {doi: index for index, doi in enumerate(self.dois)}
+        self.size = len(self.dois)
+
+        edge_total = len(source_target_format)
+        sources = np.fromiter(
+            map(self.doi_index.__getitem__, source_dois), np.int64, edge_total
+        )
+        targets = np.fromiter(
+            map(self.doi_index.__getitem__, target_dois), np.int64, edge_total
+        )
+        bucket_codes = {
+            relation_type: code
+            for code, relation_types in enumerate(buckets.values())
+            for relation_type in relation_types
+        }
+        edge_buckets = np.fromiter(
+            map(
+                bucket_codes.get,
+                map(itemgetter("source_relation_type_id"), source_target_format),
+                repeat(-1),
+            ),
+            np.int64,
+            edge_total,
+        )
+
+        self.adjacency = {}
+        for code, bucket in enumerate(buckets):
+            in_bucket = edge_buckets == code
+            # The same link is often recorded on both of its DOIs
+            unique_edges = _sorted_unique(
+                sources[in_bucket] * max(self.size, 1) + targets[in_bucket]
+            )
+            bucket_sources, bucket_targets = np.divmod(unique_edges, max(self.size, 1))
+            self.adjacency[bucket] = CsrAdjacency.from_edges(
+                bucket_sources, bucket_targets, self.size
+            )
+        self._combined_adjacency = None
+
+    @classmethod
+    def from_report(cls, report, buckets=RELATION_BUCKETS):
+        """Build the graph for a ``DoiRelationRelatonsReport`` and its corpus."""
+        dois = (item["doi"] for item in report.connections)
+        return cls(report.source_target_format, dois, buckets)
+
+    def as_dict(self, values):
+        return {doi: value.item() for doi, value in zip(self.dois, values)}
+
+    def _edges(self, bucket=None):
+        np = _require_numpy()
+        buckets = self.adjacency.keys() if bucket is None else [bucket]
+        sources = [self.adjacency[name].sources for name in buckets]
+        targets = [self.adjacency[name].indices for name in buckets]
+        return (
+            np.concatenate(sources or [np.empty(0, dtype=np.int64)]),
+            np.concatenate(targets or [np.empty(0, dtype=np.int64)]),
+        )
+
+    def _combined(self, bucket=None):
+        if bucket is not None:
+            return self.adjacency[bucket]
+        if self._combined_adjacency is None:
+            sources, targets = self._edges()
+            self._combined_adjacency = CsrAdjacency.from_edges(
+                sources, targets, self.size
+            )
+        return self._combined_adjacency
+
+    def out_degree(self, bucket=None):
+        """Number of outgoing edges per node, in one bucket or in all of them."""
+        np = _require_numpy()
+        sources, _ = self._edges(bucket)
+        return np.bincount(sources, minlength=self.size)
+
+    def in_degree(self, bucket=None):
+        """Number of incoming edges per node, in one bucket or in all of them."""
+        np = _require_numpy()
+        _, targets = self._edges(bucket)
+        return np.bincount(targets, minlength=self.size)
+
+    def connected_components(self, bucket=None):
+        """Label every node with its weakly connected component.
+
+        Uses hooking and pointer jumping over the whole edge list, so each
+        round is a handful of vectorised passes and the number of rounds
+        grows with the logarithm of the component diameter.
+
+        Returns:
+            numpy.ndarray: Component ids numbered from 0 in order of the
+                first node of each component
+        """
+        np = _require_numpy()
+        sources, targets = self._edges(bucket)
+        labels = np.arange(self.size, dtype=np.int64)
+        while True:
+            source_labels, target_labels = labels[sources], labels[targets]
+            crossing = source_labels != target_labels
+            if not crossing.any():
+                break
+            low = np.minimum(source_labels[crossing], target_labels[crossing])
+            high = np.maximum(source_labels[crossing], target_labels[crossing])
+            # Hook roots onto smaller roots, labels never exceed their node
+            np.minimum.at(labels, high, low)
+            while True:
+                jumped = labels[labels]
+                if np.array_equal(jumped, labels):
+                    break
+                labels = jumped
+        _, components = np.unique(labels, return_inverse=True)
+        return components
+
+    def k_hop_reachability(self, dois, k, bucket=None, direction="out"):
+        """Find the nodes reachable from ``dois`` in at most ``k`` hops.
+
+        Args:
+            dois (iterable): DOIs to start from
+            k (int): Maximum number of hops
+            bucket (str): Only follow edges of this bucket, all by default
+            direction (str): Follow edges "out", "in" or "both" ways
+
+        Returns:
+            dict: Reachable DOIs mapped to their hop distance
+        """
+        np = _require_numpy()
+        adjacency = self._combined(bucket)
+        steps = {
+            "out": [adjacency],
+            "in": [adjacency.transpose()],
+            "both": [adjacency, adjacency.transpose()],
+        }[direction]
+        distance = np.full(self.size, -1, dtype=np.int64)
+        frontier = _sorted_unique(
+            np.array(
+                [self.doi_index[doi] for doi in dois if doi in self.doi_index],
+                dtype=np.int64,
+            )
+        )
+        distance[frontier] = 0
+        for hop in range(1, k + 1):
+            if not len(frontier):
+                break
+            reached = np.concatenate([step.neighbours(frontier) for step in steps])
+            frontier = _sorted_unique(reached[distance[reached] < 0])
+            distance[frontier] = hop
+        reachable = np.flatnonzero(distance >= 0)
+        return {self.dois[node]: int(distance[node]) for node in reachable}
+
+    def pagerank(
+        self, bucket=None, damping=0.85, tolerance=1e-10, max_iterations=100
+    ):
+        """Rank nodes by PageRank over the edges of one or all buckets.
+
+        Each iteration is a single scatter-add over the edge list. Rank held
+        by nodes without outgoing edges is spread evenly over all nodes.
+
+        Returns:
+            numpy.ndarray: Ranks summing to 1
+        """
+        np = _require_numpy()
+        if not self.size:
+            return np.empty(0)
+        sources, targets = self._edges(bucket)
+        out_degree = np.bincount(sources, minlength=self.size)
+        dangling = out_degree == 0
+        edge_weight = 1.0 / out_degree[sources]
+        rank = np.full(self.size, 1.0 / self.size)
+        for _ in range(max_iterations):
+            flow = np.bincount(
+                targets, weights=rank[sources] * edge_weight, minlength=self.size
+            )
+            updated = (1 - damping) / self.size + damping * (
+                flow + rank[dangling].sum() / self.size
+            )
+            converged = np.abs(updated - rank).sum() < tolerance
+            rank = updated
+            if converged:
+                break
+        return rank
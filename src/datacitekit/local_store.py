@@ -0,0 +1,183 @@
+import gzip
+import json
+import sqlite3
+import threading
+from itertools import islice
+
+from .extractors import extract_doi
+
+# Attributes kept for every record, enough for all report parsers
+STORED_FIELDS = (
+    "doi",
+    "types",
+    "relatedIdentifiers",
+    "updated",
+    "creators",
+    "contributors",
+)
+
+# SQLite's default limit on host parameters in one statement
+MAX_VARIABLES = 999
+
+
+def _open(path):
+    if str(path).endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, encoding="utf-8")
+
+
+def iter_dump_records(path):
+    """Stream the records of a DataCite data file.
+
+    ``.jsonl`` files (optionally gzipped) hold one record per line, ``.json``
+    files either a list of records or an API response with a ``data`` list.
+    """
+    with _open(path) as dump:
+        if ".jsonl" in str(path):
+            for line in dump:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            content = json.load(dump)
+            yield from content.get("data", []) if isinstance(content, dict) else content
+
+
+class LocalStore:
+    """DataCite records in a local sqlite database.
+
+    Records are indexed by their DOI and by every related identifier that is
+    a DOI, so that the incoming-link and id lookups made by ``DoiSearcher``
+    and ``DoiListSearcher`` are answered from disk. Pass the store to a
+    searcher as ``local_store`` to use it instead of the API.
+
+    Args:
+        path (str): Path of the sqlite database, created if missing
+        fields (tuple): Attributes stored for every record
+    """
+
+    def __init__(self, path, fields=STORED_FIELDS):
+        self.path = path
+        self.fields = fields
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self.connection.executescript(
+            """
+            PRAGMA journal_mode = WAL;
+            CREATE TABLE IF NOT EXISTS records (
+                doi TEXT PRIMARY KEY,
+                updated TEXT,
+                record TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS related_dois (
+                doi TEXT NOT NULL,
+                related_doi TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS related_dois_related_doi
+                ON related_dois (related_doi);
+            CREATE INDEX IF NOT EXISTS related_dois_doi ON related_dois (doi);
+            """
+        )
+
+    def close(self):
+        self.connection.close()
+
+    def _row(self, record):
+        attributes = record.get("attributes") or record
+        doi = extract_doi(record.get("id") or attributes.get("doi") or "")
+        if doi is None:
+            return None, ()
+        stored = {
+            "id": doi,
+            "type": "dois",
+            "attributes": {
+                field: attributes[field] for field in self.fields if field in attributes
+            },
+        }
+        related_dois = {
+            extract_doi(related.get("relatedIdentifier") or "")
+            for related in attributes.get("relatedIdentifiers") or []
+        }
+        related_dois.discard(None)
+        return (
+            (doi, attributes.get("updated"), json.dumps(stored, separators=(",", ":"))),
+            [(doi, related_doi) for related_doi in related_dois],
+        )
+
+    def add_records(self, records):
+        """Insert or replace ``records`` in one transaction.
+
+        Returns:
+            int: Number of records stored
+        """
+        rows = {}
+        related_rows = {}
+        # The last copy of a record wins, as it would across batches
+        for record in records:
+            row, related = self._row(record)
+            if row is not None:
+                rows[row[0]] = row
+                related_rows[row[0]] = related
+        with self._lock, self.connection:
+            self.connection.executemany(
+                "DELETE FROM related_dois WHERE doi = ?", [(doi,) for doi in rows]
+            )
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO records (doi, updated, record) "
+                "VALUES (?, ?, ?)",
+                rows.values(),
+            )
+            self.connection.executemany(
+                "INSERT INTO related_dois (doi, related_doi) VALUES (?, ?)",
+                (row for related in related_rows.values() for row in related),
+            )
+        return len(rows)
+
+    def ingest(self, paths, batch_size=10000):
+        """Stream DataCite data files into the store.
+
+        Args:
+            paths (iterable): Paths of ``.json``/``.jsonl`` files, optionally
+                gzipped
+            batch_size (int): Records written per transaction
+
+        Returns:
+            int: Number of records stored
+        """
+        total = 0
+        for path in paths:
+            records = iter_dump_records(path)
+            while batch := list(islice(records, batch_size)):
+                total += self.add_records(batch)
+        return total
+
+    def _records(self, sql, parameters):
+        with self._lock:
+            rows = self.connection.execute(sql, parameters).fetchall()
+        for (record,) in rows:
+            yield json.loads(record)
+
+    def records_linking_to(self, doi, updated_since=None):
+        """Yield the record of ``doi`` and the records relating to it."""
+        sql = (
+            "SELECT record FROM records WHERE (doi = ? OR doi IN "
+            "(SELECT doi FROM related_dois WHERE related_doi = ?))"
+        )
+        parameters = [doi, doi]
+        if updated_since:
+            sql += " AND updated >= ?"
+            parameters.append(updated_since)
+        yield from self._records(sql + " ORDER BY doi", parameters)
+
+    def records_by_doi(self, dois, updated_since=None):
+        """Yield the records of ``dois`` that are in the store."""
+        dois = list(dict.fromkeys(dois))
+        for start in range(0, len(dois), MAX_VARIABLES - 1):
+            chunk = dois[start : start + MAX_VARIABLES - 1]
+            sql = "SELECT record FROM records WHERE doi IN ({})".format(
+                ",".join("?" * len(chunk))
+            )
+            parameters = list(chunk)
+            if updated_since:
+                sql += " AND updated >= ?"
+                parameters.append(updated_since)
+            yield from self._records(sql, parameters)
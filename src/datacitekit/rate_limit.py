@@ -0,0 +1,271 @@
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+# DataCite allows roughly 3000 requests per 5 minutes per client
+DEFAULT_RATE = 10.0
+DEFAULT_BURST = 10
+
+
+class TokenBucket:
+    """Thread-safe token bucket shared by every searcher in a process.
+
+    Args:
+        rate (float): Tokens added per second
+        capacity (float): Maximum number of tokens the bucket can hold,
+            defaults to ``rate``
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else rate)
+        self._tokens = self.capacity
+        self._updated = self._now()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _now():
+        return time.monotonic()
+
+    def _refill(self, tokens, updated, now):
+        return min(self.capacity, tokens + (now - updated) * self.rate)
+
+    def _update(self, change):
+        """Apply ``change`` to the refilled token count and store the result.
+
+        ``change`` receives the available tokens and returns a tuple of the
+        new token count and the value to hand back to the caller.
+        """
+        with self._lock:
+            now = self._now()
+            available = self._refill(self._tokens, self._updated, now)
+            self._tokens, result = change(available)
+            self._updated = now
+        return result
+
+    def _take(self, tokens):
+        def change(available):
+            if available >= tokens:
+                return available - tokens, 0.0
+            return available, (tokens - available) / self.rate
+
+        return self._update(change)
+
+    def try_acquire(self, tokens=1):
+        """Take ``tokens`` if they are available right now."""
+        return self._take(tokens) == 0.0
+
+    def acquire(self, tokens=1, timeout=None):
+        """Block until ``tokens`` could be taken from the bucket.
+
+        Returns False without waiting if ``timeout`` seconds would not be
+        enough to get them, True once they were taken.
+        """
+        expires_at = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self._take(tokens)
+            if wait == 0.0:
+                return True
+            if expires_at is not None and time.monotonic() + wait > expires_at:
+                return False
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """Drain the bucket so that no sharer sends for ``seconds``."""
+
+        def change(available):
+            return min(available, 0.0) - seconds * self.rate, None
+
+        self._update(change)
+
+
+class SqliteTokenBucket(TokenBucket):
+    """Token bucket whose state lives in a sqlite file shared by processes.
+
+    Args:
+        path (str): Path of the sqlite database
+        rate (float): Tokens added per second, across all processes
+        capacity (float): Maximum number of tokens the bucket can hold
+        name (str): Name of the bucket, several buckets can share a file
+    """
+
+    def __init__(self, path, rate=DEFAULT_RATE, capacity=None, name="datacite"):
+        super().__init__(rate, capacity)
+        self.path = path
+        self.name = name
+        connection = self._connect()
+        try:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS token_buckets "
+                "(name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+            )
+        finally:
+            connection.close()
+
+    @staticmethod
+    def _now():
+        # Wall clock, monotonic clocks are not comparable between processes
+        return time.time()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    def _update(self, change):
+        connection = self._connect()
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            row = connection.execute(
+                "SELECT tokens, updated FROM token_buckets WHERE name = ?",
+                (self.name,),
+            ).fetchone()
+            now = self._now()
+            if row is None:
+                available = self.capacity
+            else:
+                available = self._refill(row[0], row[1], now)
+            tokens, result = change(available)
+            connection.execute(
+                "INSERT OR REPLACE INTO token_buckets (name, tokens, updated) "
+                "VALUES (?, ?, ?)",
+                (self.name, tokens, now),
+            )
+            connection.execute("COMMIT")
+        finally:
+            connection.close()
+        return result
+
+
+class AdaptiveConcurrency:
+    """Limit on requests in flight that adjusts itself to the responses.
+
+    The limit grows additively while responses are successful and fast, and
+    shrinks multiplicatively on 429s, server errors and latency increases.
+
+    Args:
+        initial (int): Starting number of concurrent requests
+        minimum (int): Lowest limit the controller will shrink to
+        maximum (int): Highest limit the controller will grow to
+        latency_tolerance (float): Ratio to the baseline latency above which
+            a response is considered slow
+    """
+
+    def __init__(self, initial=4, minimum=1, maximum=16, latency_tolerance=2.0):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.latency_tolerance = latency_tolerance
+        self.limit = float(initial)
+        self.baseline_latency = None
+        self._in_flight = 0
+        self._condition = threading.Condition()
+
+    def acquire(self, timeout=None):
+        """Wait for a free slot, at most ``timeout`` seconds, and take it.
+
+        Returns:
+            bool: Whether a slot was taken
+        """
+        with self._condition:
+            if not self._condition.wait_for(
+                lambda: self._in_flight < int(self.limit), timeout
+            ):
+                return False
+            self._in_flight += 1
+            return True
+
+    def release(self):
+        with self._condition:
+            self._in_flight -= 1
+            self._condition.notify()
+
+    def record(self, status_code, latency):
+        with self._condition:
+            baseline = self.baseline_latency
+            if status_code == 429:
+                self.limit = max(self.minimum, self.limit / 2)
+            elif status_code >= 500 or (
+                baseline is not None and latency > baseline * self.latency_tolerance
+            ):
+                self.limit = max(self.minimum, self.limit * 0.9)
+            elif 200 <= status_code < 300:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            if 200 <= status_code < 300:
+                self.baseline_latency = (
+                    latency if baseline is None else 0.9 * baseline + 0.1 * latency
+                )
+            self._condition.notify_all()
+
+
+class RequestSlot:
+    """Permission to send one request, handed out by ``RateLimiter.request``."""
+
+    def __init__(self, limiter):
+        self.limiter = limiter
+        self.started = time.monotonic()
+
+    def record(self, status_code, retry_after=None):
+        """Report the outcome of the request to the limiter.
+
+        Args:
+            status_code (int): HTTP status of the response
+            retry_after (float): Seconds the server asked us to wait, if any
+        """
+        latency = time.monotonic() - self.started
+        self.limiter.concurrency.record(status_code, latency)
+        if status_code == 429:
+            self.limiter.bucket.pause(
+                retry_after if retry_after is not None else 1 / self.limiter.bucket.rate
+            )
+
+
+class RateLimiter:
+    """Token bucket combined with adaptive concurrency control.
+
+    Args:
+        bucket (TokenBucket): Bucket to take tokens from, an in-memory
+            bucket allowing ``DEFAULT_RATE`` requests per second by default
+        concurrency (AdaptiveConcurrency): Controller for requests in flight
+    """
+
+    def __init__(self, bucket=None, concurrency=None):
+        self.bucket = bucket or TokenBucket(DEFAULT_RATE, DEFAULT_BURST)
+        self.concurrency = concurrency or AdaptiveConcurrency()
+
+    @contextmanager
+    def request(self, timeout=None):
+        """Wait for a concurrency slot and a token, then yield a ``RequestSlot``.
+
+        Raises ``TimeoutError`` instead of waiting longer than ``timeout``
+        seconds in total.
+        """
+        started = time.monotonic()
+        if not self.concurrency.acquire(timeout):
+            raise TimeoutError("No request slot became free in time")
+        try:
+            if timeout is not None:
+                timeout = max(0.0, timeout - (time.monotonic() - started))
+            if not self.bucket.acquire(timeout=timeout):
+                raise TimeoutError("No rate limit token would be available in time")
+            yield RequestSlot(self)
+        finally:
+            self.concurrency.release()
+
+
+_default_rate_limiter = None
+_default_rate_limiter_lock = threading.Lock()
+
+
+def get_default_rate_limiter():
+    """Return the rate limiter shared by all searchers in this process."""
+    global _default_rate_limiter
+    with _default_rate_limiter_lock:
+        if _default_rate_limiter is None:
+            _default_rate_limiter = RateLimiter()
+        return _default_rate_limiter
+
+
+def set_default_rate_limiter(rate_limiter):
+    """Replace the process-wide rate limiter, e.g. with a sqlite-backed one."""
+    global _default_rate_limiter
+    with _default_rate_limiter_lock:
+        _default_rate_limiter = rate_limiter
@@ -0,0 +1,171 @@
+import threading
+import time
+from collections import Counter, OrderedDict, namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor
+
+CacheEntry = namedtuple("CacheEntry", ["value", "loaded_at"])
+
+
+class RefreshScheduler:
+    """Stale-while-revalidate cache for expensive DOI corpora and reports.
+
+    Fresh entries are served from memory. Entries older than ``ttl`` but
+    within the ``grace`` window are still served while a background refresh
+    rebuilds them. Only entries past the grace window, or never loaded, are
+    loaded on the caller's thread, and concurrent callers for the same key
+    wait for that one load.
+
+    Access counts are tracked per key and halved on every ``tick`` so that
+    they follow current traffic. ``tick`` also refreshes the ``hot_keys``
+    most accessed keys once they are ``refresh_ahead`` of the way to expiry,
+    so hot keys are rebuilt before anyone sees them stale, and drops entries
+    past the grace window. At most ``max_entries`` entries are kept, the
+    least recently used are dropped first.
+
+    Exceptions raised by the loader are passed to the caller and never
+    cached, so a loader should raise, e.g. ``LookupError`` for a DOI not
+    registered yet, for anything that must be looked up again next time.
+
+    Args:
+        loader (callable): Builds the value for a key, e.g. a DOI
+        ttl (float): Seconds an entry is fresh
+        grace (float): Seconds after ``ttl`` an entry may still be served
+        hot_keys (int): Number of most accessed keys refreshed ahead of expiry
+        refresh_ahead (float): Fraction of ``ttl`` after which hot keys are
+            refreshed
+        max_concurrent_refreshes (int): Cap on background refreshes in flight
+        max_entries (int): Cap on the number of entries held
+    """
+
+    def __init__(
+        self,
+        loader,
+        ttl=3600,
+        grace=600,
+        hot_keys=100,
+        refresh_ahead=0.8,
+        max_concurrent_refreshes=4,
+        max_entries=1000,
+    ):
+        self.loader = loader
+        self.ttl = ttl
+        self.grace = grace
+        self.hot_keys = hot_keys
+        self.refresh_ahead = refresh_ahead
+        self.max_concurrent_refreshes = max_concurrent_refreshes
+        self.max_entries = max_entries
+        self.access_counts = Counter()
+        self.stats = Counter()
+        # Least recently used first
+        self._entries = OrderedDict()
+        self._loading = {}
+        # Keys being refreshed in the background, cold loads are not counted
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent_refreshes)
+        self._ticker = None
+        self._stopped = threading.Event()
+
+    @staticmethod
+    def _now():
+        return time.monotonic()
+
+    def get(self, key):
+        """Return the value for ``key``, loading or refreshing it as needed."""
+        with self._lock:
+            self.access_counts[key] += 1
+            entry = self._entries.get(key)
+            age = self._now() - entry.loaded_at if entry else None
+            if entry:
+                self._entries.move_to_end(key)
+            if entry and age < self.ttl:
+                self.stats["fresh"] += 1
+                return entry.value
+            if entry and age < self.ttl + self.grace:
+                self.stats["stale"] += 1
+                self._schedule_refresh(key)
+                return entry.value
+            self.stats["cold"] += 1
+            future = self._loading.get(key)
+            owner = future is None
+            if owner:
+                future = self._loading[key] = Future()
+        if owner:
+            self._load(key, future)
+        return future.result()
+
+    def _load(self, key, future):
+        try:
+            value = self.loader(key)
+        except Exception as error:
+            with self._lock:
+                del self._loading[key]
+                self.stats["errors"] += 1
+            future.set_exception(error)
+            return
+        with self._lock:
+            self._entries[key] = CacheEntry(value, self._now())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evicted"] += 1
+            del self._loading[key]
+        future.set_result(value)
+
+    def _refresh(self, key, future):
+        try:
+            self._load(key, future)
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _schedule_refresh(self, key):
+        # Called with the lock held
+        in_flight = len(self._refreshing)
+        if key in self._loading or in_flight >= self.max_concurrent_refreshes:
+            return False
+        # The stale value keeps being served if the refresh fails
+        future = self._loading[key] = Future()
+        self._refreshing.add(key)
+        self._executor.submit(self._refresh, key, future)
+        self.stats["refreshes"] += 1
+        return True
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def tick(self):
+        """Refresh hot keys close to expiry, drop expired entries and decay counts."""
+        with self._lock:
+            now = self._now()
+            for key, entry in list(self._entries.items()):
+                if now - entry.loaded_at >= self.ttl + self.grace:
+                    del self._entries[key]
+                    self.stats["expired"] += 1
+            for key, _ in self.access_counts.most_common(self.hot_keys):
+                entry = self._entries.get(key)
+                if entry and now - entry.loaded_at >= self.ttl * self.refresh_ahead:
+                    self._schedule_refresh(key)
+            for key in list(self.access_counts):
+                self.access_counts[key] //= 2
+                if not self.access_counts[key]:
+                    del self.access_counts[key]
+
+    def start(self, interval=60):
+        """Call ``tick`` every ``interval`` seconds on a daemon thread."""
+
+        def run():
+            while not self._stopped.wait(interval):
+                self.tick()
+
+        self._stopped.clear()
+        self._ticker = threading.Thread(target=run, daemon=True)
+        self._ticker.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._ticker is not None:
+            self._ticker.join()
+            self._ticker = None
+        self._executor.shutdown(wait=False)
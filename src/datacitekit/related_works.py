@@ -3,7 +3,23 @@
 from .doi_relations import DoiRelationRelatonsReport
 from .extractors import extract_doi
 from .resource_type_graph import RelatedWorkReports
-from .searchers import DoiListSearcher, DoiSearcher
+from .searchers import Deadline, DoiListSearcher, DoiSearcher
+
+
+class Corpus(dict):
+    """DOI attributes keyed by DOI, built against a deadline.
+
+    Attributes:
+        partial (bool): Whether a search stopped at the deadline, so that
+            records are missing
+        completeness (dict): Pages and records fetched by the ``incoming``
+            and ``outgoing`` searches, out of the totals reported by the API
+    """
+
+    def __init__(self, *args, partial=False, completeness=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.partial = partial
+        self.completeness = completeness or {}
 
 
 def get_relation_types_grouped_by_doi(related_dois):
@@ -19,32 +35,44 @@ def parse_list(doi_list, parser):
     return {d["id"]: parser(d) for d in doi_list}
 
 
-def get_incoming_and_primary_attributes(doi_query, doi_url, parser):
+def get_incoming_and_primary_attributes(doi_query, doi_url, parser, **search_options):
     # Get incoming links and primary doi
-    doi_list = DoiSearcher(doi_query, doi_url).search()
+    doi_list = DoiSearcher(doi_query, doi_url, **search_options).search()
     doi_attributes = parse_list(doi_list, parser)
     return doi_attributes
 
 
-def get_outgoing_link_attributes(primary_doi, doi_url, parser):
+def get_outgoing_link_attributes(primary_doi, doi_url, parser, **search_options):
     relations_grouped_by_doi = get_relation_types_grouped_by_doi(
         primary_doi.get("related_identifiers", [])
     )
     # Get outgoing links
     outgoing_dois = relations_grouped_by_doi.keys()
-    outgoing_doi_list = DoiListSearcher(outgoing_dois, doi_url).search()
+    outgoing_doi_list = DoiListSearcher(
+        outgoing_dois, doi_url, **search_options
+    ).search()
     outgoing_doi_attributes = parse_list(outgoing_doi_list, parser)
     return outgoing_doi_attributes
 
 
 def get_full_corpus_doi_attributes(
-    doi_query, parser, api_url="https://api.stage.datacite.org/dois/"
+    doi_query,
+    parser,
+    api_url="https://api.stage.datacite.org/dois/",
+    deadline=None,
+    **search_options,
 ):
-    doi_attributes = get_incoming_and_primary_attributes(doi_query, api_url, parser)
+    if deadline is not None:
+        return get_corpus_before_deadline(
+            doi_query, parser, api_url, deadline, **search_options
+        )
+    doi_attributes = get_incoming_and_primary_attributes(
+        doi_query, api_url, parser, **search_options
+    )
     if doi_query in doi_attributes.keys():
         primary_doi = doi_attributes.get(doi_query, {})
         outgoing_doi_attributes = get_outgoing_link_attributes(
-            primary_doi, api_url, parser
+            primary_doi, api_url, parser, **search_options
         )
     else:
         outgoing_doi_attributes = {}
@@ -54,6 +82,92 @@ def get_full_corpus_doi_attributes(
     return full_doi_attributes
 
 
+def get_corpus_before_deadline(doi_query, parser, api_url, deadline, **search_options):
+    """Fetch as much of the full corpus as ``deadline`` allows.
+
+    The most useful records are fetched first: the primary DOI, the first
+    page of incoming links, the records the primary DOI links to and then
+    the remaining pages of incoming links. No page is requested once the
+    deadline has passed, and requests still in flight are given up when it
+    passes. If even the primary record did not arrive, the corpus is empty
+    and partial. Once complete, the corpus is the one of
+    ``get_full_corpus_doi_attributes`` without a deadline, at the cost of
+    one more request.
+
+    Args:
+        doi_query (str): The primary DOI
+        parser (callable): Turns a raw record into DOI attributes
+        api_url (str): DataCite API to query
+        deadline (Deadline): When to stop, or a time budget in seconds
+        **search_options: Passed on to the searchers
+
+    Returns:
+        Corpus: The DOI attributes fetched, flagged as partial if the
+            deadline cut a search short
+    """
+    if not isinstance(deadline, Deadline):
+        deadline = Deadline(deadline)
+    primary = DoiListSearcher([doi_query], api_url, deadline=deadline, **search_options)
+    primary_attributes = parse_list(primary.iter_search(), parser)
+    if primary.partial:
+        return Corpus(partial=True, completeness={"incoming": None, "outgoing": None})
+
+    incoming = DoiSearcher(doi_query, api_url, deadline=deadline, **search_options)
+    doi_attributes = parse_list(incoming.iter_search(last_page=1), parser)
+
+    outgoing = None
+    outgoing_doi_attributes = {}
+    primary_doi = primary_attributes.get(doi_query)
+    if primary_doi is not None:
+        relations_grouped_by_doi = get_relation_types_grouped_by_doi(
+            primary_doi.get("related_identifiers", [])
+        )
+        outgoing = DoiListSearcher(
+            relations_grouped_by_doi.keys(),
+            api_url,
+            deadline=deadline,
+            **search_options,
+        )
+        outgoing_doi_attributes = parse_list(outgoing.iter_search(), parser)
+
+    if (incoming.total_pages or 0) > 1:
+        doi_attributes.update(parse_list(incoming.iter_search(first_page=2), parser))
+    if doi_query not in doi_attributes:
+        doi_attributes = {**primary_attributes, **doi_attributes}
+
+    return Corpus(
+        {**doi_attributes, **outgoing_doi_attributes},
+        partial=incoming.partial or (outgoing is not None and outgoing.partial),
+        completeness={
+            "incoming": incoming.completeness,
+            "outgoing": outgoing.completeness if outgoing is not None else None,
+        },
+    )
+
+
+def iter_full_corpus_records(
+    doi_query, parser, api_url="https://api.stage.datacite.org/dois/", **search_options
+):
+    """Yield the raw records of the full corpus page by page.
+
+    Incoming links and the primary DOI come first, the records the primary
+    DOI links to follow once the incoming search is done. Feed them to a
+    ``StreamingReportBuilder`` to build reports without holding the corpus.
+    """
+    primary_doi = None
+    for record in DoiSearcher(doi_query, api_url, **search_options).iter_search():
+        if record["id"] == doi_query:
+            primary_doi = parser(record)
+        yield record
+    if primary_doi is not None:
+        relations_grouped_by_doi = get_relation_types_grouped_by_doi(
+            primary_doi.get("related_identifiers", [])
+        )
+        yield from DoiListSearcher(
+            relations_grouped_by_doi.keys(), api_url, **search_options
+        ).iter_search()
+
+
 def _get_query():
     import sys
 
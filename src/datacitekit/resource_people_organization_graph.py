@@ -2,24 +2,102 @@ from collections import defaultdict
 
 from glom import Coalesce, Iter, glom
 
+from .distinct import HyperLogLog, IdentifierInterner, IdSet, identifier_hash
 from .extractors import extract_doi, extract_orcid, extract_ror_id
-from .utils import camel_terms
+from .resource_type_graph import RelatedWorkReports
+from .utils import corpus_status, resource_type_label
 
 
 def camel_to_string(value):
-    return " ".join(camel_terms(value))
+    return resource_type_label(value)
+
+
+class PeopleOrgCounts:
+    """Distinct people and organisations per resource type.
+
+    Identifiers are counted as each entry is seen and not kept with it. In
+    ``"exact"`` mode ORCID and ROR ids are interned to integers and the
+    distinct sets are bitmaps. In ``"approximate"`` mode their hashes go
+    straight into HyperLogLog counters, so memory stays within a fixed
+    bound per resource type however many identifiers there are.
+    """
+
+    DISTINCT_MODES = ("exact", "approximate")
+
+    def __init__(self, distinct="exact"):
+        if distinct not in self.DISTINCT_MODES:
+            raise ValueError(f"Unknown distinct counting mode: {distinct}")
+        self.distinct = distinct
+        self.people_ids = IdentifierInterner()
+        self.org_ids = IdentifierInterner()
+        self.people_counts = defaultdict(self._distinct_set)
+        self.org_counts = defaultdict(self._distinct_set)
+        self.full_people = self._distinct_set()
+        self.full_orgs = self._distinct_set()
+
+    def _distinct_set(self):
+        return HyperLogLog() if self.distinct == "approximate" else IdSet()
+
+    def _count(self, identifiers, interner, distinct_set, full_set):
+        if self.distinct == "approximate":
+            hashes = [identifier_hash(identifier) for identifier in identifiers]
+            distinct_set.update_hashes(hashes)
+            full_set.update_hashes(hashes)
+        else:
+            ids = interner.intern_all(identifiers)
+            distinct_set.update(ids)
+            full_set.update(ids)
+
+    def add(self, resource_type, orcid_ids=(), ror_ids=()):
+        """Count ORCID and ROR ids found on records of ``resource_type``."""
+        self._count(
+            orcid_ids,
+            self.people_ids,
+            self.people_counts[resource_type],
+            self.full_people,
+        )
+        self._count(
+            ror_ids, self.org_ids, self.org_counts[resource_type], self.full_orgs
+        )
 
 
 class Aggregator:
-    def __init__(self, base_connections):
+    """Aggregate resource types, their connections and distinct people/orgs.
+
+    People and organisations are counted by ``people_orgs`` while the
+    connections are built, see ``RelatedWorkWithPeopleOrgsReport``. Without
+    it they are counted from the ``orcid_ids`` and ``ror_ids`` of the
+    connections, when present. Only ``len()`` of the distinct sets is used
+    by reports.
+    """
+
+    DISTINCT_MODES = PeopleOrgCounts.DISTINCT_MODES
+
+    def __init__(
+        self, base_connections, distinct="exact", partials=None, people_orgs=None
+    ):
         self.base_connections = base_connections
-        aggregations = self.aggregations()
+        if people_orgs is None:
+            people_orgs = PeopleOrgCounts(distinct)
+            if partials is None:
+                for entry in base_connections:
+                    people_orgs.add(
+                        entry["resource_type"],
+                        entry.get("orcid_ids", ()),
+                        entry.get("ror_ids", ()),
+                    )
+        self.people_orgs = people_orgs
+        self.distinct = people_orgs.distinct
+        if partials is None:
+            aggregations = self.aggregations()
+        else:
+            aggregations = self.merge(partials)
         self.type_connections = aggregations["type_connections"]
         self.type_counts = aggregations["type_counts"]
-        self.people_counts = aggregations["people_counts"]
-        self.org_counts = aggregations["org_counts"]
-        self.full_people = aggregations["full_people"]
-        self.full_orgs = aggregations["full_orgs"]
+        self.people_counts = people_orgs.people_counts
+        self.org_counts = people_orgs.org_counts
+        self.full_people = people_orgs.full_people
+        self.full_orgs = people_orgs.full_orgs
 
     def aggregations(self):
         resource_types = {
@@ -27,35 +105,59 @@ class Aggregator:
         }
         type_connections = defaultdict(lambda: defaultdict(int))
         type_counts = defaultdict(int)
-        people_counts = defaultdict(set)
-        org_counts = defaultdict(set)
-        full_people = set()
-        full_orgs = set()
         for entry in self.base_connections:
             source_type = entry["resource_type"]
             type_counts[source_type] += 1
-            people_counts[source_type].update(entry["orcid_ids"])
-            org_counts[source_type].update(entry["ror_ids"])
-            full_people.update(entry["orcid_ids"])
-            full_orgs.update(entry["ror_ids"])
             for conn in entry["connections"]:
                 target_type = resource_types[conn["related_doi"]]
                 type_connections[source_type][target_type] += 1
         return {
             "type_connections": type_connections,
             "type_counts": type_counts,
-            "people_counts": people_counts,
-            "org_counts": org_counts,
-            "full_people": full_people,
-            "full_orgs": full_orgs,
+        }
+
+    def merge(self, partials):
+        """Combine partial aggregations of consecutive slices of the corpus.
+
+        Counts are summed and identifier sets united, in order, so keys keep
+        the order in which ``aggregations`` would have first seen them.
+        Partials built in other processes hold identifier strings, which are
+        only counted here so that every partial shares one interner.
+        """
+        type_connections = defaultdict(lambda: defaultdict(int))
+        type_counts = defaultdict(int)
+        for partial in partials:
+            for resource_type, count in partial["type_counts"].items():
+                type_counts[resource_type] += count
+            for source_type, targets in partial["type_connections"].items():
+                for target_type, count in targets.items():
+                    type_connections[source_type][target_type] += count
+            for resource_type, people in partial["people_counts"].items():
+                self.people_orgs.add(resource_type, orcid_ids=people)
+            for resource_type, orgs in partial["org_counts"].items():
+                self.people_orgs.add(resource_type, ror_ids=orgs)
+        return {
+            "type_connections": type_connections,
+            "type_counts": type_counts,
         }
 
 
 class RelatedWorkWithPeopleOrgsReport:
-    def __init__(self, data):
+    def __init__(
+        self, data, distinct="exact", base_connections=None, aggregator=None
+    ):
         self.data = data
-        self.base_connections = self._base_connections()
-        self.aggregator = Aggregator(self.base_connections)
+        if aggregator is not None:
+            self.people_orgs = aggregator.people_orgs
+        else:
+            self.people_orgs = PeopleOrgCounts(distinct)
+        if base_connections is None:
+            base_connections = self._base_connections()
+        self.base_connections = base_connections
+        self.aggregator = aggregator or Aggregator(
+            self.base_connections, people_orgs=self.people_orgs
+        )
+        self.partial, self.completeness = corpus_status(data)
 
     @staticmethod
     def is_a_doi(related):
@@ -152,32 +254,31 @@ class RelatedWorkWithPeopleOrgsReport:
         }
         return glom(doi_result, spec)
 
+    @staticmethod
+    def _people_and_orgs(entry):
+        orcid_ids = set(entry.get("creator_orcid_ids", [])).union(
+            set(entry.get("contributor_orcid_ids", []))
+        )
+        ror_ids = (
+            set(entry.get("creator_ror_ids", []))
+            .union(set(entry.get("contributor_ror_ids", [])))
+            .union(set(entry.get("creator_affiliation_ror_ids", [])))
+            .union(set(entry.get("contributor_affiliation_ror_ids", [])))
+        )
+        return orcid_ids, ror_ids
+
     def _base_connections(self):
+        """Build the connections, counting people and orgs into ``people_orgs``."""
         dois = self.data.keys()
         report = []
         for doi, entry in self.data.items():
-            connections = []
-            for related in entry.get("related_identifiers", []):
-                related_doi = extract_doi(related["relatedIdentifier"])
-                if related_doi in dois:
-                    connections.append(
-                        {
-                            "related_doi": related_doi,
-                            "relation_type": related.get("relationType", "Unknown"),
-                        }
-                    )
+            resource_type = self._get_resource_type(entry)
+            self.people_orgs.add(resource_type, *self._people_and_orgs(entry))
             report.append(
                 {
                     "doi": doi,
-                    "connections": connections,
-                    "resource_type": self._get_resource_type(entry),
-                    "orcid_ids": set(entry.get("creator_orcid_ids", [])).union(
-                        set(entry.get("contributor_orcid_ids", []))
-                    ),
-                    "ror_ids": set(entry.get("creator_ror_ids", []))
-                    .union(set(entry.get("contributor_ror_ids", [])))
-                    .union(set(entry.get("creator_affiliation_ror_ids", [])))
-                    .union(set(entry.get("contributor_affiliation_ror_ids", []))),
+                    "connections": RelatedWorkReports._connections(entry, dois),
+                    "resource_type": resource_type,
                 }
             )
         return report
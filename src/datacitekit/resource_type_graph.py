@@ -3,17 +3,33 @@ from collections import defaultdict
 from glom import Coalesce, Iter, glom
 
 from .extractors import extract_doi
-from .utils import camel_terms
+from .type_graph_numpy import TypeGraphCodes, aggregate_type_graph
+from .utils import corpus_status, resource_type_label
 
 
 class Aggregator:
-    def __init__(self, base_connections):
+    BACKENDS = ("python", "numpy")
+
+    def __init__(self, base_connections, backend="python", partials=None, codes=None):
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown aggregation backend: {backend}")
         self.base_connections = base_connections
-        aggregations = self.aggregations()
+        self.backend = backend
+        # Integer codes for the numpy backend, encoded here when not given
+        self.codes = codes
+        if partials is None:
+            aggregations = self.aggregations()
+        else:
+            aggregations = self.merge(partials)
         self.type_connections = aggregations["type_connections"]
         self.type_counts = aggregations["type_counts"]
 
     def aggregations(self):
+        if self.backend == "numpy":
+            codes = self.codes or TypeGraphCodes.from_base_connections(
+                self.base_connections
+            )
+            return aggregate_type_graph(codes)
         resource_types = {
             entry["doi"]: entry["resource_type"] for entry in self.base_connections
         }
@@ -30,12 +46,40 @@ class Aggregator:
             "type_counts": type_counts,
         }
 
+    @staticmethod
+    def merge(partials):
+        """Sum partial aggregations of consecutive slices of the corpus.
+
+        Partials are merged in order, so keys keep the order in which
+        ``aggregations`` would have first seen them.
+        """
+        type_connections = defaultdict(lambda: defaultdict(int))
+        type_counts = defaultdict(int)
+        for partial in partials:
+            for resource_type, count in partial["type_counts"].items():
+                type_counts[resource_type] += count
+            for source_type, targets in partial["type_connections"].items():
+                for target_type, count in targets.items():
+                    type_connections[source_type][target_type] += count
+        return {
+            "type_connections": type_connections,
+            "type_counts": type_counts,
+        }
+
 
 class RelatedWorkReports:
-    def __init__(self, data):
+    def __init__(self, data, backend="python", base_connections=None, aggregator=None):
         self.data = data
-        self.base_connections = self._base_connections()
-        self.aggregator = Aggregator(self.base_connections)
+        codes = None
+        if base_connections is None:
+            if backend == "numpy" and aggregator is None:
+                codes = TypeGraphCodes()
+            base_connections = self._base_connections(codes)
+        self.base_connections = base_connections
+        self.aggregator = aggregator or Aggregator(
+            self.base_connections, backend, codes=codes
+        )
+        self.partial, self.completeness = corpus_status(data)
 
     @staticmethod
     def is_a_doi(related):
@@ -60,30 +104,61 @@ class RelatedWorkReports:
         }
         return glom(doi_result, spec)
 
-    def _base_connections(self):
-        dois = self.data.keys()
-        report = []
-        for doi, entry in self.data.items():
-            connections = []
+    @staticmethod
+    def _connections(entry, dois, targets=None):
+        """Connections of an entry to DOIs in ``dois``.
+
+        When ``targets`` is given, ``dois`` maps each DOI to its code and
+        the code of every related DOI is appended to ``targets``.
+        """
+        connections = []
+        if targets is not None:
             for related in entry.get("related_identifiers", []):
                 related_doi = extract_doi(related["relatedIdentifier"])
-                if related_doi in dois:
+                code = dois.get(related_doi)
+                if code is not None:
                     connections.append(
                         {
                             "related_doi": related_doi,
                             "relation_type": related.get("relationType", "Unknown"),
                         }
                     )
+                    targets.append(code)
+            return connections
+        for related in entry.get("related_identifiers", []):
+            related_doi = extract_doi(related["relatedIdentifier"])
+            if related_doi in dois:
+                connections.append(
+                    {
+                        "related_doi": related_doi,
+                        "relation_type": related.get("relationType", "Unknown"),
+                    }
+                )
+        return connections
+
+    def _base_connections(self, codes=None):
+        if codes is None:
+            dois = self.data.keys()
+        else:
+            dois = {doi: index for index, doi in enumerate(self.data)}
+        targets = None if codes is None else codes.targets
+        report = []
+        for doi, entry in self.data.items():
+            connections = self._connections(entry, dois, targets)
+            resource_type = self._get_resource_type(entry)
             report.append(
                 {
                     "doi": doi,
                     "connections": connections,
-                    "resource_type": self._get_resource_type(entry),
+                    "resource_type": resource_type,
                 }
             )
+            if codes is not None:
+                codes.add_entry(resource_type, len(connections))
         return report
 
-    def _is_a_project(self, doi_attributes):
+    @staticmethod
+    def _is_a_project(doi_attributes):
         return doi_attributes.get("resourceType", "Unknown") == "Project" and (
             doi_attributes.get("resourceTypeGeneral", "Unknown")
             in [
@@ -92,12 +167,11 @@ class RelatedWorkReports:
             ]
         )
 
-    def _get_resource_type(self, doi_attributes):
-        if self._is_a_project(doi_attributes):
+    @staticmethod
+    def _get_resource_type(doi_attributes):
+        if RelatedWorkReports._is_a_project(doi_attributes):
             return "Project"
-        return " ".join(
-            camel_terms(doi_attributes.get("resourceTypeGeneral", "Unknown"))
-        )
+        return resource_type_label(doi_attributes.get("resourceTypeGeneral", "Unknown"))
 
     @property
     def aggregate_counts(self):
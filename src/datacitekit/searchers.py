@@ -1,51 +1,339 @@
-import requests
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 from .extractors import extract_doi
+from .rate_limit import get_default_rate_limiter
+from .transport import RequestsTransport
+
+DEFAULT_FIELDS = "doi,types,relatedIdentifiers,updated"
+MAX_PAGE_SIZE = 1000
+
+
+class AdaptivePageSize:
+    """Choose the size of each page of a search from what earlier pages cost.
+
+    Sizes are ``first_size`` multiplied or divided by powers of two, so a
+    page can always start exactly where the records fetched so far end:
+    the size only grows once the number of records fetched is a multiple of
+    the new size, which doubles it at most once per page. Sizes are capped
+    so that a page is predicted to take at most ``target_latency`` seconds
+    and ``max_payload`` bytes, and kept no larger than the records left
+    according to ``meta.total``.
+
+    Args:
+        first_size (int): Size of the first page
+        target_latency (float): Seconds a page should take at most
+        max_payload (int): Bytes a page should weigh at most
+    """
+
+    def __init__(self, first_size=100, target_latency=2.0, max_payload=5_000_000):
+        self.first_size = first_size
+        self.target_latency = target_latency
+        self.max_payload = max_payload
+        self.seconds_per_record = None
+        self.bytes_per_record = None
+        sizes = [first_size]
+        while sizes[0] % 2 == 0:
+            sizes.insert(0, sizes[0] // 2)
+        while sizes[-1] * 2 <= MAX_PAGE_SIZE:
+            sizes.append(sizes[-1] * 2)
+        self.sizes = sizes
+
+    @staticmethod
+    def _smoothed(previous, value):
+        return value if previous is None else 0.7 * previous + 0.3 * value
+
+    def observe(self, records, latency, payload_bytes):
+        """Record the cost of a page of ``records`` records."""
+        records = max(records, 1)
+        self.seconds_per_record = self._smoothed(
+            self.seconds_per_record, latency / records
+        )
+        self.bytes_per_record = self._smoothed(
+            self.bytes_per_record, payload_bytes / records
+        )
+
+    def next_size(self, offset, total):
+        """Size of the page starting at record ``offset`` of ``total``."""
+        cap = MAX_PAGE_SIZE
+        if self.seconds_per_record:
+            cap = min(cap, self.target_latency / self.seconds_per_record)
+        if self.bytes_per_record:
+            cap = min(cap, self.max_payload / self.bytes_per_record)
+        aligned = [size for size in self.sizes if offset % size == 0]
+        size = max([size for size in aligned if size <= cap] or aligned[:1])
+        enough = [size for size in self.sizes if size >= total - offset]
+        if enough:
+            size = min(size, enough[0])
+        return size
+
+
+class SearchError(Exception):
+    """A page of a search could not be fetched."""
+
+
+class Deadline:
+    """Point in time after which a search requests no more pages.
+
+    Requests of a search with a deadline are given the time remaining as
+    their timeout, including the wait for the rate limiter, so a slow page
+    is abandoned rather than holding up the search past its deadline.
+
+    Args:
+        seconds (float): Time budget, starting now
+    """
+
+    def __init__(self, seconds):
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self):
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self):
+        return time.monotonic() >= self.expires_at
 
 
 class DataCiteSearcher:
     def __init__(
-        self, search_url="https://api.datacite.org/dois/", query="", page_size=100
+        self,
+        search_url="https://api.datacite.org/dois/",
+        query="",
+        page_size=100,
+        rate_limiter=None,
+        workers=1,
+        max_retries=3,
+        updated_since=None,
+        fields=DEFAULT_FIELDS,
+        local_store=None,
+        adaptive=False,
+        transport=None,
+        deadline=None,
     ):
         self.search_query = query
         self.search_url = search_url
         self.page_size = page_size
+        self.rate_limiter = rate_limiter or get_default_rate_limiter()
+        self.workers = workers
+        self.max_retries = max_retries
+        self.updated_since = updated_since
+        self.fields = fields
+        # Searchers answering from a local store define ``local_records``
+        if local_store is not None and not hasattr(self, "local_records"):
+            raise ValueError(f"{type(self).__name__} cannot search a local store")
+        self.local_store = local_store
+        self.adaptive = adaptive
+        self.transport = transport or RequestsTransport()
+        self.deadline = deadline
+        # Progress of the searches made so far, see ``completeness``
+        self.pages_fetched = 0
+        self.total_pages = None
+        self.records_fetched = 0
+        self.total_records = None
+        # Set when a search stopped at the deadline before its last page
+        self.partial = False
+
+    def _query(self, query=""):
+        query = query or self.search_query
+        if self.updated_since:
+            # Only records changed since the given timestamp
+            updated_clause = f'updated:["{self.updated_since}" TO *]'
+            query = f"({query}) AND {updated_clause}" if query else updated_clause
+        return query
 
-    def search_params(self, page=1, query=""):
+    def search_params(self, page=1, query="", page_size=None):
         return {
-            "query": query or self.search_query,
+            "query": self._query(query),
             "disable_facets": "true",
             "include-other-registration-agencies": "true",
-            "page[size]": self.page_size,
+            "page[size]": page_size or self.page_size,
             "page[number]": page,
-            "fields[dois]": "doi,types,relatedIdentifiers",
+            "fields[dois]": self.fields,
         }
 
-    def data_for_page(self, page):
-        response = requests.get(self.search_url, params=self.search_params(page))
+    @staticmethod
+    def _retry_after(response):
+        try:
+            return float(response.headers.get("Retry-After"))
+        except (TypeError, ValueError):
+            return None
+
+    def _timeout(self):
+        """Seconds left before the deadline, None without one."""
+        if self.deadline is None:
+            return None
+        remaining = self.deadline.remaining()
+        if not remaining:
+            raise TimeoutError("The search deadline has passed")
+        return remaining
+
+    def _get(self, params):
+        for _ in range(self.max_retries + 1):
+            if self.transport.rate_limited:
+                with self.rate_limiter.request(self._timeout()) as slot:
+                    response = self.transport.get(
+                        self.search_url, params=params, timeout=self._timeout()
+                    )
+                    slot.record(response.status_code, self._retry_after(response))
+            else:
+                # Replayed responses are served at the archive's own pace
+                response = self.transport.get(
+                    self.search_url, params=params, timeout=self._timeout()
+                )
+            if response.status_code != 429:
+                break
+        return response
+
+    def data_for_page(self, page, page_size=None):
+        response = self._get(self.search_params(page, page_size=page_size))
         if response.ok:
             return response.json()
         else:
             return {}
 
-    def search(self):
-        data = []
-        page = 1
-        response = self.data_for_page(page)
+    def _checked_json(self, response, page):
+        if not response.ok:
+            retried = " after retries" if response.status_code == 429 else ""
+            raise SearchError(
+                f"Page {page} of the search failed with HTTP "
+                f"{response.status_code}{retried}"
+            )
+        return response.json()
+
+    def _page_before_deadline(self, page):
+        """Fetch ``page``, or return None if it cannot arrive before the deadline."""
+        if self.deadline is not None and self.deadline.expired:
+            self.partial = True
+            return None
+        try:
+            response = self._get(self.search_params(page))
+        except TimeoutError:
+            if self.deadline is None:
+                raise
+            self.partial = True
+            return None
+        return self._checked_json(response, page)
+
+    def _track(self, response):
         if response:
-            data += response["data"]
+            records = response.get("data", [])
+            self.pages_fetched += 1
+            self.records_fetched += len(records)
+            self.total_records = response["meta"]["total"]
+            self.total_pages = response["meta"]["totalPages"]
+
+    @property
+    def completeness(self):
+        """Pages and records fetched so far, out of the totals reported."""
+        return {
+            "pages_fetched": self.pages_fetched,
+            "total_pages": self.total_pages,
+            "records_fetched": self.records_fetched,
+            "total_records": self.total_records,
+        }
+
+    def _measured_page(self, page, page_size):
+        started = time.monotonic()
+        response = self._get(self.search_params(page, page_size=page_size))
+        data = self._checked_json(response, page)
+        return data, time.monotonic() - started, len(response.content)
+
+    def _iter_adaptive_search(self):
+        """Page with adaptive sizes, fetching each page while the last is used."""
+        sizer = AdaptivePageSize(self.page_size)
+        offset = 0
+        page_size = self.page_size
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            next_page = executor.submit(self._measured_page, 1, page_size)
+            while next_page is not None:
+                try:
+                    response, latency, payload_bytes = next_page.result()
+                except TimeoutError:
+                    if self.deadline is None:
+                        raise
+                    self.partial = True
+                    return
+                next_page = None
+                if not response:
+                    return
+                records = response.get("data", [])
+                sizer.observe(len(records), latency, payload_bytes)
+                offset += page_size
+                total = response["meta"]["total"]
+                self.pages_fetched += 1
+                self.records_fetched += len(records)
+                self.total_records = total
+                self.total_pages = self.pages_fetched
+                if offset < total and records:
+                    page_size = sizer.next_size(offset, total)
+                    self.total_pages += math.ceil((total - offset) / page_size)
+                    if self.deadline is not None and self.deadline.expired:
+                        self.partial = True
+                    else:
+                        next_page = executor.submit(
+                            self._measured_page, offset // page_size + 1, page_size
+                        )
+                yield from records
+
+    def _data_for_pages(self, pages):
+        if self.workers > 1:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                yield from executor.map(self._page_before_deadline, pages)
+        else:
+            yield from map(self._page_before_deadline, pages)
+
+    def iter_search(self, first_page=1, last_page=None):
+        """Yield the records of every page as soon as the page has arrived.
+
+        Raises ``SearchError`` when a page fails, including when it is still
+        rate limited after ``max_retries`` retries, rather than leaving its
+        records out. With a ``deadline`` no page is requested once it has passed, and
+        ``partial`` and ``completeness`` tell how far the search got.
+
+        Args:
+            first_page (int): First page to fetch
+            last_page (int): Last page to fetch, the last page of the search
+                by default. Searches of a page range use fixed-size pages.
+        """
+        if self.local_store is not None:
+            yield from self.local_records()
+            return
+        if self.adaptive and first_page == 1 and last_page is None:
+            yield from self._iter_adaptive_search()
+            return
+        response = self._page_before_deadline(first_page)
+        self._track(response)
+        if response:
+            yield from response["data"]
             total_pages = response["meta"]["totalPages"]
-            if total_pages > 1:
-                for page in range(2, total_pages + 1):
-                    response = self.data_for_page(page)
-                    data += response["data"]
-        return data
+            if last_page is not None:
+                total_pages = min(total_pages, last_page)
+            if total_pages > first_page:
+                pages = range(first_page + 1, total_pages + 1)
+                for response in self._data_for_pages(pages):
+                    self._track(response)
+                    yield from (response or {}).get("data", [])
+
+    def search(self):
+        return list(self.iter_search())
+
+    def count(self):
+        """Return the number of matching records, or None if the request failed."""
+        if self.local_store is not None:
+            return sum(1 for _ in self.local_records())
+        response = self.data_for_page(1, page_size=1)
+        if response:
+            return response["meta"]["total"]
+        return None
 
 
 class DoiSearcher(DataCiteSearcher):
-    def __init__(self, doi, search_url="https://api.datacite.org/dois/", page_size=100):
+    def __init__(
+        self, doi, search_url="https://api.datacite.org/dois/", page_size=100, **kwargs
+    ):
         self.doi = extract_doi(doi)
-        super().__init__(search_url, self.doi_search_query, page_size)
+        super().__init__(search_url, self.doi_search_query, page_size, **kwargs)
 
     @property
     def doi_permutations(self):
@@ -56,22 +344,39 @@ class DoiSearcher(DataCiteSearcher):
     def doi_search_query(self):
         return " OR ".join(self.doi_permutations)
 
+    def local_records(self):
+        return self.local_store.records_linking_to(self.doi, self.updated_since)
+
 
 class DoiListSearcher(DataCiteSearcher):
-    def __init__(self, doi_list, search_url="https://api.datacite.org/dois/"):
+    def __init__(
+        self,
+        doi_list,
+        search_url="https://api.datacite.org/dois/",
+        page_size=100,
+        **kwargs,
+    ):
         self.doi_list = self._verified_doi_list(doi_list)
-        super().__init__(search_url)
+        super().__init__(search_url, page_size=page_size, **kwargs)
 
-    def search_params(self, page=1, query=""):
-        _search_params = super().search_params(page, query)
+    def search_params(self, page=1, query="", page_size=None):
+        _search_params = super().search_params(page, query, page_size)
         _search_params["ids"] = ",".join(self.doi_list)
         return _search_params
 
+    def local_records(self):
+        return self.local_store.records_by_doi(self.doi_list, self.updated_since)
+
     def _verified_doi_list(self, raw_doi_list):
         temp_list = (extract_doi(doi) for doi in raw_doi_list)
         return [doi for doi in temp_list if doi is not None]
 
-    def search(self):
+    def iter_search(self, first_page=1, last_page=None):
+        if not self.doi_list:
+            return iter(())
+        return super().iter_search(first_page, last_page)
+
+    def count(self):
         if not self.doi_list:
-            return []
-        return super().search()
+            return 0
+        return super().count()
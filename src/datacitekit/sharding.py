@@ -0,0 +1,164 @@
+import multiprocessing
+import os
+from collections import Counter
+
+from .doi_relations import DoiRelationRelatonsReport
+from .resource_people_organization_graph import (
+    Aggregator as PeopleOrgsAggregator,
+)
+from .resource_people_organization_graph import RelatedWorkWithPeopleOrgsReport
+from .resource_type_graph import Aggregator, RelatedWorkReports
+
+# Corpus shared with the worker processes by the pool initializer, inherited
+# copy-on-write where processes are forked
+_shared = {}
+
+
+def _init_worker(items, resource_types, people_orgs):
+    _shared["items"] = items
+    _shared["resource_types"] = resource_types
+    _shared["people_orgs"] = people_orgs
+
+
+def _aggregate_shard(bounds):
+    """Build connections and partial aggregations for one slice of the corpus."""
+    start, stop = bounds
+    resource_types = _shared["resource_types"]
+    people_orgs = _shared["people_orgs"]
+    base_connections = []
+    type_counts = {}
+    type_connections = {}
+    people_counts = {}
+    org_counts = {}
+    for doi, entry in _shared["items"][start:stop]:
+        source_type = resource_types[doi]
+        connections = RelatedWorkReports._connections(entry, resource_types)
+        base_entry = {
+            "doi": doi,
+            "connections": connections,
+            "resource_type": source_type,
+        }
+        type_counts[source_type] = type_counts.get(source_type, 0) + 1
+        for conn in connections:
+            targets = type_connections.setdefault(source_type, {})
+            target_type = resource_types[conn["related_doi"]]
+            targets[target_type] = targets.get(target_type, 0) + 1
+        if people_orgs:
+            # Kept only in the per-type sets, as strings since ids interned
+            # in different workers would not match
+            orcid_ids, ror_ids = RelatedWorkWithPeopleOrgsReport._people_and_orgs(
+                entry
+            )
+            people_counts.setdefault(source_type, set()).update(orcid_ids)
+            org_counts.setdefault(source_type, set()).update(ror_ids)
+        base_connections.append(base_entry)
+
+    relation_report = DoiRelationRelatonsReport(None, connections=base_connections)
+    return {
+        "base_connections": base_connections,
+        "source_target_format": relation_report.source_target_format,
+        "warning_counts": relation_report.warning_counts,
+        "unhandled_relation_types": relation_report.unhandled_relation_types,
+        "type_counts": type_counts,
+        "type_connections": type_connections,
+        "people_counts": people_counts,
+        "org_counts": org_counts,
+    }
+
+
+def shard_bounds(size, shards):
+    """Split ``range(size)`` into ``shards`` consecutive, near equal slices."""
+    shards = max(1, min(shards, size))
+    step, extra = divmod(size, shards)
+    bounds = []
+    start = 0
+    for shard in range(shards):
+        stop = start + step + (shard < extra)
+        bounds.append((start, stop))
+        start = stop
+    return bounds
+
+
+class ShardedCorpus:
+    """Build the reports of a large corpus on every core.
+
+    The corpus is split into consecutive slices of source DOIs. Worker
+    processes build the connections, type counts, type connections and
+    people/organisation sets of their slices against the DOI set of the
+    whole corpus, and convert their connections to source-target format.
+    The partial results are merged in slice order with sums and set unions,
+    so the reports are identical to the single process ones.
+
+    Resource types are labelled in the parent, which is a table lookup per
+    record, so that every worker can resolve the type of any target DOI.
+    Under the ``spawn`` start method the corpus is pickled once per worker,
+    and the usual ``if __name__ == "__main__":`` guard is needed.
+
+    Args:
+        data (dict): DOI attributes keyed by DOI
+        processes (int): Worker processes, all cores by default
+        shards (int): Slices to split the corpus into, 4 per process by default
+        people_orgs (bool): Also collect ORCID and ROR ids, for
+            ``people_orgs_report``
+    """
+
+    def __init__(self, data, processes=None, shards=None, people_orgs=False):
+        self.data = data
+        self.people_orgs = people_orgs
+        processes = processes or os.cpu_count() or 1
+        items = list(data.items())
+        resource_types = {
+            doi: RelatedWorkReports._get_resource_type(entry) for doi, entry in items
+        }
+        bounds = shard_bounds(len(items), shards or 4 * processes)
+        initargs = (items, resource_types, people_orgs)
+        if processes == 1:
+            _init_worker(*initargs)
+            try:
+                self.partials = list(map(_aggregate_shard, bounds))
+            finally:
+                _shared.clear()
+        else:
+            with multiprocessing.Pool(
+                processes, initializer=_init_worker, initargs=initargs
+            ) as pool:
+                self.partials = pool.map(_aggregate_shard, bounds)
+
+        self.base_connections = [
+            entry for partial in self.partials for entry in partial["base_connections"]
+        ]
+
+    def related_work_reports(self):
+        aggregator = Aggregator(self.base_connections, partials=self.partials)
+        return RelatedWorkReports(
+            self.data, base_connections=self.base_connections, aggregator=aggregator
+        )
+
+    def people_orgs_report(self, distinct="exact"):
+        if not self.people_orgs:
+            raise ValueError("ShardedCorpus was built without people_orgs=True")
+        aggregator = PeopleOrgsAggregator(
+            self.base_connections, distinct, partials=self.partials
+        )
+        return RelatedWorkWithPeopleOrgsReport(
+            self.data, base_connections=self.base_connections, aggregator=aggregator
+        )
+
+    def relation_report(self):
+        report = DoiRelationRelatonsReport(
+            self.data,
+            connections=self.base_connections,
+            source_target_format=[
+                pair
+                for partial in self.partials
+                for pair in partial["source_target_format"]
+            ],
+        )
+        report.warning_counts = sum(
+            (partial["warning_counts"] for partial in self.partials), Counter()
+        )
+        report.unhandled_relation_types = sum(
+            (partial["unhandled_relation_types"] for partial in self.partials),
+            Counter(),
+        )
+        return report
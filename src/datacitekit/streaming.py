@@ -0,0 +1,141 @@
+from collections import Counter, defaultdict
+
+from .doi_relations import DoiRelationRelatonsReport
+from .extractors import extract_doi
+from .resource_type_graph import RelatedWorkReports
+
+
+def _decrement(counter, key):
+    counter[key] -= 1
+    if not counter[key]:
+        del counter[key]
+
+
+class StreamingReportBuilder:
+    """Build relation and type-graph reports in one pass over a record stream.
+
+    Records, e.g. from ``DataCiteSearcher.iter_search``, are parsed and
+    reduced to their resource type and DOI links as they arrive, so the raw
+    JSON is never held for the whole corpus. Type counts and type-to-type
+    connections are updated on every record. Links to DOIs that have not
+    arrived yet wait in a pending index and are counted once their target
+    arrives; links still pending when the stream ends point outside the
+    corpus and are dropped, like ``_base_connections`` drops them.
+
+    A DOI that arrives twice replaces its earlier attributes but keeps its
+    position, the same as building the corpus dict, so the finished reports
+    are identical to building them from that dict.
+
+    Args:
+        parser (callable): Turns a raw record into DOI attributes
+    """
+
+    def __init__(self, parser=RelatedWorkReports.parser):
+        self.parser = parser
+        # DOI -> (resource type, ((related DOI, relation type), ...))
+        self._records = {}
+        # DOI -> DOIs of the records linking to it, resolved or still pending
+        self._incoming = defaultdict(list)
+        self.type_counts = Counter()
+        self.type_connections = defaultdict(Counter)
+
+    def __len__(self):
+        return len(self._records)
+
+    def __contains__(self, doi):
+        return doi in self._records
+
+    @property
+    def pending_edge_count(self):
+        """Number of links whose target DOI has not arrived yet."""
+        return sum(
+            len(sources)
+            for target, sources in self._incoming.items()
+            if target not in self._records
+        )
+
+    def add(self, record):
+        """Parse a raw DataCite record and add it to the reports."""
+        self.add_attributes(record["id"], self.parser(record))
+
+    def consume(self, records):
+        for record in records:
+            self.add(record)
+        return self
+
+    def add_attributes(self, doi, attributes):
+        """Add the parsed attributes of ``doi`` to the reports."""
+        if doi in self._records:
+            self._retract(doi)
+        resource_type = RelatedWorkReports._get_resource_type(attributes)
+        edges = []
+        for related in attributes.get("related_identifiers", []):
+            related_doi = extract_doi(related.get("relatedIdentifier", ""))
+            if related_doi is not None:
+                edges.append((related_doi, related.get("relationType", "Unknown")))
+        self._records[doi] = (resource_type, tuple(edges))
+        self.type_counts[resource_type] += 1
+
+        # Resolve the links that were waiting for this DOI
+        for source in self._incoming.get(doi, ()):
+            self.type_connections[self._records[source][0]][resource_type] += 1
+        for target, _ in edges:
+            self._incoming[target].append(doi)
+            if target in self._records:
+                self.type_connections[resource_type][self._records[target][0]] += 1
+
+    def _retract(self, doi):
+        resource_type, edges = self._records[doi]
+        _decrement(self.type_counts, resource_type)
+        # Also removes links of the record to itself
+        for source in self._incoming.get(doi, ()):
+            _decrement(self.type_connections[self._records[source][0]], resource_type)
+        for target, _ in edges:
+            self._incoming[target].remove(doi)
+            if target in self._records and target != doi:
+                _decrement(
+                    self.type_connections[resource_type], self._records[target][0]
+                )
+
+    def remove(self, doi):
+        """Take ``doi`` out of the reports, e.g. after it was deleted."""
+        if doi in self._records:
+            self._retract(doi)
+            del self._records[doi]
+
+    def finish(self):
+        """End the stream, drop unresolved links and return the base connections.
+
+        Returns:
+            list: Entries in the format of ``RelatedWorkReports.base_connections``
+        """
+        for target in [t for t in self._incoming if t not in self._records]:
+            del self._incoming[target]
+        return self.base_connections()
+
+    def base_connections(self):
+        """Return the base connections so far, keeping the stream open.
+
+        Returns:
+            list: Entries in the format of ``RelatedWorkReports.base_connections``
+        """
+        return [
+            {
+                "doi": doi,
+                "connections": [
+                    {"related_doi": target, "relation_type": relation_type}
+                    for target, relation_type in edges
+                    if target in self._records
+                ],
+                "resource_type": resource_type,
+            }
+            for doi, (resource_type, edges) in self._records.items()
+        ]
+
+    def related_work_reports(self, backend="python"):
+        """Finish the stream and return its ``RelatedWorkReports``."""
+        return RelatedWorkReports(None, backend, base_connections=self.finish())
+
+    def relation_report(self):
+        """Finish the stream and return its ``DoiRelationRelatonsReport``."""
+        return DoiRelationRelatonsReport(None, connections=self.finish())
@@ -0,0 +1,198 @@
+from .doi_relations import DoiRelationRelatonsReport
+from .related_works import get_relation_types_grouped_by_doi
+from .resource_type_graph import Aggregator, RelatedWorkReports
+from .searchers import DoiListSearcher, DoiSearcher
+from .streaming import StreamingReportBuilder
+
+
+class CorpusSync:
+    """Keep the full corpus of a DOI up to date with delta queries.
+
+    The first ``sync`` fetches the same corpus as
+    ``get_full_corpus_doi_attributes``. Later calls only ask each of the
+    incoming and outgoing queries for records whose ``updated`` timestamp
+    is at least the newest one held from that query, and merge them into
+    the corpus:
+
+    - incoming records that changed are replaced, new ones added
+    - if a query now matches another number of records than are held, its
+      matching DOIs are listed: records no longer found (deleted, or no
+      longer linking to the DOI) are removed, and records the delta missed,
+      e.g. because the search index lagged behind their ``updated``
+      timestamp, are fetched
+    - when the primary DOI changed its links, records it no longer links to
+      are removed and newly linked ones fetched in full
+    - outgoing records that changed are replaced, deleted ones removed
+
+    A sync where nothing changed costs one delta and one count request for
+    each of the incoming and outgoing queries. ``changes`` lists the DOIs
+    added, updated and removed. The type counts and connections of
+    ``related_work_reports`` are kept up to date with every change instead
+    of being rebuilt from the corpus.
+
+    Args:
+        doi_query (str): The primary DOI
+        parser (callable): Turns a raw record into DOI attributes
+        api_url (str): DataCite API to query
+        **search_options: Passed on to the searchers
+    """
+
+    def __init__(
+        self,
+        doi_query,
+        parser,
+        api_url="https://api.stage.datacite.org/dois/",
+        **search_options,
+    ):
+        self.doi = doi_query
+        self.parser = parser
+        self.api_url = api_url
+        self.search_options = search_options
+        self.incoming = {}
+        self.outgoing = {}
+        self.outgoing_links = set()
+        self.updated = {}
+        self.changes = {"added": set(), "updated": set(), "removed": set()}
+        self.builder = StreamingReportBuilder(parser)
+
+    @property
+    def corpus(self):
+        """The full corpus, in the format of ``get_full_corpus_doi_attributes``."""
+        if self.doi not in self.incoming:
+            return {}
+        return {**self.incoming, **self.outgoing}
+
+    @property
+    def synced_until(self):
+        return max(filter(None, self.updated.values()), default=None)
+
+    def _watermark(self, attributes):
+        """Newest ``updated`` timestamp of the records held from one query."""
+        return max(filter(None, map(self.updated.get, attributes)), default=None)
+
+    def _incoming_searcher(self, **options):
+        # Options of the call override those given to the sync
+        options = {**self.search_options, **options}
+        return DoiSearcher(self.doi, self.api_url, **options)
+
+    def _list_searcher(self, doi_list, **options):
+        # DOIs in a stable order, so that a sync makes the same requests on
+        # every run and can be replayed from a recording
+        options = {**self.search_options, **options}
+        return DoiListSearcher(sorted(doi_list), self.api_url, **options)
+
+    def _update_reports(self, doi):
+        # A DOI can be both an incoming and an outgoing record
+        attributes = self.outgoing.get(doi) or self.incoming.get(doi)
+        if attributes is None:
+            self.builder.remove(doi)
+        else:
+            self.builder.add_attributes(doi, attributes)
+
+    def _merge(self, attributes, records):
+        for record in records:
+            doi = record["id"]
+            updated = (record.get("attributes") or {}).get("updated")
+            if doi in attributes and updated and self.updated.get(doi) == updated:
+                continue
+            if doi not in self.incoming and doi not in self.outgoing:
+                self.changes["added"].add(doi)
+            else:
+                self.changes["updated"].add(doi)
+            attributes[doi] = self.parser(record)
+            self.updated[doi] = updated
+            self._update_reports(doi)
+
+    def _remove(self, attributes, dois):
+        for doi in dois:
+            attributes.pop(doi, None)
+            if doi not in self.incoming and doi not in self.outgoing:
+                self.updated.pop(doi, None)
+                self.changes["removed"].add(doi)
+            self._update_reports(doi)
+
+    def _reconcile(self, attributes, dois, searcher):
+        """Match ``attributes`` to what ``searcher`` finds, if its count is off.
+
+        Args:
+            attributes (dict): Incoming or outgoing attributes
+            dois (list): DOIs held that the search should find
+            searcher (callable): Creates the searcher, given searcher options
+        """
+        if searcher().count() == len(dois):
+            return
+        found = [record["id"] for record in searcher(fields="doi").iter_search()]
+        self._remove(attributes, [doi for doi in dois if doi not in set(found)])
+        missed = [doi for doi in found if doi not in attributes]
+        if missed:
+            self._merge(attributes, self._list_searcher(missed).iter_search())
+
+    def _outgoing_dois(self):
+        primary_doi = self.incoming.get(self.doi)
+        if primary_doi is None:
+            return set()
+        return set(
+            get_relation_types_grouped_by_doi(
+                primary_doi.get("related_identifiers", [])
+            )
+        )
+
+    def sync(self):
+        """Bring the corpus up to date and return it."""
+        self.changes = {"added": set(), "updated": set(), "removed": set()}
+        incoming_since = self._watermark(self.incoming)
+        outgoing_since = self._watermark(self.outgoing)
+
+        resync = bool(self.incoming)
+        self._merge(
+            self.incoming,
+            self._incoming_searcher(updated_since=incoming_since).iter_search(),
+        )
+        if resync:
+            self._reconcile(self.incoming, list(self.incoming), self._incoming_searcher)
+
+        links = self._outgoing_dois()
+        self._remove(
+            self.outgoing, [doi for doi in self.outgoing if doi not in links]
+        )
+        kept_links = links & self.outgoing_links
+        self._merge(
+            self.outgoing, self._list_searcher(links - kept_links).iter_search()
+        )
+        if kept_links:
+            self._merge(
+                self.outgoing,
+                self._list_searcher(
+                    kept_links, updated_since=outgoing_since
+                ).iter_search(),
+            )
+            self._reconcile(
+                self.outgoing,
+                [doi for doi in self.outgoing if doi in kept_links],
+                lambda **options: self._list_searcher(kept_links, **options),
+            )
+        self.outgoing_links = links
+        return self.corpus
+
+    def related_work_reports(self):
+        """``RelatedWorkReports`` of the corpus, from the aggregates kept in sync.
+
+        The counts are those of a report built from ``corpus``, but resource
+        types and connections are listed in the order the syncs first saw
+        them rather than in corpus order.
+        """
+        aggregations = {
+            "type_counts": self.builder.type_counts,
+            "type_connections": self.builder.type_connections,
+        }
+        base_connections = self.builder.base_connections()
+        aggregator = Aggregator(base_connections, partials=[aggregations])
+        return RelatedWorkReports(
+            None, base_connections=base_connections, aggregator=aggregator
+        )
+
+    def relation_report(self):
+        """``DoiRelationRelatonsReport`` of the corpus."""
+        return DoiRelationRelatonsReport(
+            None, connections=self.builder.base_connections()
+        )
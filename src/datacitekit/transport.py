@@ -0,0 +1,289 @@
+import gzip
+import json
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+
+from .rate_limit import get_default_rate_limiter
+
+# Response headers kept in recordings, the only ones the searchers read
+RECORDED_HEADERS = ("Retry-After", "Content-Type")
+
+
+def _request_key(url, params):
+    return json.dumps([url, sorted((params or {}).items())], separators=(",", ":"))
+
+
+class TransportResponse:
+    """A recorded response, with the parts of ``requests.Response`` in use."""
+
+    def __init__(self, status_code, content, headers=None, elapsed=0.0):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+        self.elapsed = elapsed
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class RequestsTransport:
+    """Send searcher requests to the live API, the default transport.
+
+    Transports answer ``get(url, params, timeout)``, raising ``TimeoutError``
+    when no response arrived within ``timeout`` seconds.
+    """
+
+    rate_limited = True
+
+    def get(self, url, params=None, timeout=None):
+        try:
+            return requests.get(url, params=params, timeout=timeout)
+        except requests.Timeout as error:
+            raise TimeoutError(f"No response from {url} in {timeout}s") from error
+
+    def close(self):
+        pass
+
+
+class RecordingTransport:
+    """Send requests through ``inner`` and append every exchange to an archive.
+
+    The archive is gzipped JSONL, one request with its response and latency
+    per line, and can be served back by ``ReplayTransport``. Recording to an
+    existing archive adds to it. Call ``close`` when done so the archive is
+    complete.
+
+    Args:
+        path (str): Path of the archive
+        inner: Transport the requests are sent with, the live API by default
+    """
+
+    def __init__(self, path, inner=None):
+        self.path = path
+        self.inner = inner or RequestsTransport()
+        self.rate_limited = self.inner.rate_limited
+        self._archive = gzip.open(path, "at", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def get(self, url, params=None, timeout=None):
+        started = time.monotonic()
+        response = self.inner.get(url, params=params, timeout=timeout)
+        elapsed = time.monotonic() - started
+        exchange = {
+            "url": url,
+            "params": params or {},
+            "status_code": response.status_code,
+            "headers": {
+                header: response.headers[header]
+                for header in RECORDED_HEADERS
+                if header in response.headers
+            },
+            "content": response.content.decode("utf-8"),
+            "elapsed": round(elapsed, 6),
+        }
+        line = json.dumps(exchange, separators=(",", ":")) + "\n"
+        with self._lock:
+            self._archive.write(line)
+        return response
+
+    def close(self):
+        with self._lock:
+            self._archive.close()
+        self.inner.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ReplayTransport:
+    """Serve the responses of a ``RecordingTransport`` archive.
+
+    Requests are matched on URL and parameters. A request recorded several
+    times, e.g. a 429 and its retry, gets its responses in recording order,
+    then the last one again. Replayed requests bypass the rate limiter.
+
+    Args:
+        path (str): Path of the archive
+        latency_scale (float): Fraction of the recorded latency to wait
+            before each response, 0 to replay at full speed and 1 to
+            replay at the recorded speed
+    """
+
+    rate_limited = False
+
+    def __init__(self, path, latency_scale=0.0):
+        self.path = path
+        self.latency_scale = latency_scale
+        self._responses = defaultdict(deque)
+        self._lock = threading.Lock()
+        with gzip.open(path, "rt", encoding="utf-8") as archive:
+            for line in archive:
+                exchange = json.loads(line)
+                self._responses[
+                    _request_key(exchange["url"], exchange["params"])
+                ].append(
+                    TransportResponse(
+                        exchange["status_code"],
+                        exchange["content"].encode("utf-8"),
+                        exchange["headers"],
+                        exchange["elapsed"],
+                    )
+                )
+
+    def get(self, url, params=None, timeout=None):
+        with self._lock:
+            responses = self._responses.get(_request_key(url, params))
+            if not responses:
+                raise LookupError(f"No recorded response for {url} {params}")
+            response = responses.popleft() if len(responses) > 1 else responses[0]
+        if self.latency_scale:
+            latency = response.elapsed * self.latency_scale
+            if timeout is not None and latency > timeout:
+                time.sleep(timeout)
+                raise TimeoutError(f"No response from {url} in {timeout}s")
+            time.sleep(latency)
+        return response
+
+    def close(self):
+        pass
+
+
+class HedgedTransport:
+    """Send a second copy of requests that are slower than usual.
+
+    Latencies of recent requests are kept, and once ``min_samples`` are
+    known a request still unanswered after their ``percentile`` is sent
+    again. The first response to arrive is returned; the other request is
+    cancelled if it has not started yet and its response dropped otherwise.
+    Hedges are capped at ``budget`` times the number of requests. When the
+    inner transport is rate limited, each hedge also needs a free
+    concurrency slot and a spare token from ``rate_limiter``, so hedging
+    never pushes a client over its rate limit. ``stats`` counts requests,
+    hedges, hedges that won and hedges that were not sent.
+
+    Args:
+        inner: Transport the requests are sent with, the live API by default
+        percentile (float): Latency percentile after which a request is hedged
+        budget (float): Maximum fraction of requests that are hedged
+        min_samples (int): Latencies needed before any request is hedged
+        window (int): Number of recent latencies the percentile is taken over
+        rate_limiter (RateLimiter): Limiter every hedge takes a slot and a
+            token from, the one the searchers share by default
+        max_workers (int): Threads the requests are sent from
+    """
+
+    def __init__(
+        self,
+        inner=None,
+        percentile=0.95,
+        budget=0.05,
+        min_samples=20,
+        window=200,
+        rate_limiter=None,
+        max_workers=32,
+    ):
+        self.inner = inner or RequestsTransport()
+        self.rate_limited = self.inner.rate_limited
+        self.percentile = percentile
+        self.budget = budget
+        self.min_samples = min_samples
+        if rate_limiter is None and self.inner.rate_limited:
+            rate_limiter = get_default_rate_limiter()
+        self.rate_limiter = rate_limiter
+        self.stats = Counter()
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    @property
+    def hedge_rate(self):
+        with self._lock:
+            requests_sent = self.stats["requests"]
+            return self.stats["hedged"] / requests_sent if requests_sent else 0.0
+
+    def threshold(self):
+        """Seconds after which a request is hedged, None until enough samples."""
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return None
+            latencies = sorted(self._latencies)
+        return latencies[int(self.percentile * (len(latencies) - 1))]
+
+    def _timed_get(self, url, params, timeout):
+        started = time.monotonic()
+        response = self.inner.get(url, params=params, timeout=timeout)
+        with self._lock:
+            self._latencies.append(time.monotonic() - started)
+        return response
+
+    def _hedged_get(self, url, params, timeout):
+        try:
+            return self._timed_get(url, params, timeout)
+        finally:
+            if self.rate_limiter is not None:
+                self.rate_limiter.concurrency.release()
+
+    def _may_hedge(self):
+        with self._lock:
+            if self.stats["hedged"] >= self.budget * self.stats["requests"]:
+                self.stats["over_budget"] += 1
+                return False
+        limiter = self.rate_limiter
+        if limiter is not None:
+            if not limiter.concurrency.acquire(timeout=0):
+                with self._lock:
+                    self.stats["no_slot"] += 1
+                return False
+            if not limiter.bucket.try_acquire():
+                limiter.concurrency.release()
+                with self._lock:
+                    self.stats["no_token"] += 1
+                return False
+        with self._lock:
+            self.stats["hedged"] += 1
+        return True
+
+    def get(self, url, params=None, timeout=None):
+        with self._lock:
+            self.stats["requests"] += 1
+        threshold = self.threshold()
+        started = time.monotonic()
+        primary = self._executor.submit(self._timed_get, url, params, timeout)
+        if threshold is None:
+            return primary.result()
+        done, _ = wait([primary], timeout=threshold)
+        if done or not self._may_hedge():
+            return primary.result()
+
+        if timeout is not None:
+            timeout = max(0.0, timeout - (time.monotonic() - started))
+        hedge = self._executor.submit(self._hedged_get, url, params, timeout)
+        pending = {primary, hedge}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            # The first response wins, a failed request falls back on the other
+            for future in done:
+                if future.exception() is None:
+                    for other in pending:
+                        other.cancel()
+                    if future is hedge:
+                        with self._lock:
+                            self.stats["hedge_wins"] += 1
+                    return future.result()
+        # Both requests failed
+        return primary.result()
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        self.inner.close()
@@ -1,5 +1,43 @@
 import re
 from collections import defaultdict
+from functools import lru_cache
+
+# DataCite resourceTypeGeneral controlled vocabulary
+RESOURCE_TYPE_GENERAL = (
+    "Audiovisual",
+    "Award",
+    "Book",
+    "BookChapter",
+    "Collection",
+    "ComputationalNotebook",
+    "ConferencePaper",
+    "ConferenceProceeding",
+    "DataPaper",
+    "Dataset",
+    "Dissertation",
+    "Event",
+    "Image",
+    "Instrument",
+    "InteractiveResource",
+    "Journal",
+    "JournalArticle",
+    "Model",
+    "OutputManagementPlan",
+    "PeerReview",
+    "PhysicalObject",
+    "Preprint",
+    "Project",
+    "Report",
+    "Service",
+    "Software",
+    "Sound",
+    "Standard",
+    "StudyRegistration",
+    "Text",
+    "Workflow",
+    "Other",
+    "Unknown",
+)
 
 
 def camel_terms(value):
@@ -26,6 +64,34 @@ def camel_terms(value):
     )
 
 
+RESOURCE_TYPE_LABELS = {
+    value: " ".join(camel_terms(value)) for value in RESOURCE_TYPE_GENERAL
+}
+
+
+@lru_cache(maxsize=None)
+def _camel_terms_label(value):
+    return " ".join(camel_terms(value))
+
+
+def resource_type_label(value):
+    """Convert a resourceTypeGeneral value to its space separated label.
+
+    Values from the DataCite vocabulary are looked up in a table built at
+    import time, anything else is split with ``camel_terms`` once and memoised.
+
+    Args:
+        value (str): Raw resourceTypeGeneral, e.g. "JournalArticle"
+
+    Returns:
+        str: The label, e.g. "Journal Article"
+    """
+    label = RESOURCE_TYPE_LABELS.get(value)
+    if label is None:
+        label = _camel_terms_label(value)
+    return label
+
+
 def camel_to_hyphen_case(camel_case_str):
     """Convert a camelCase string to hyphen-case format.
 
@@ -90,3 +156,12 @@ def group_by(items, key):
         groups[key_func(item)].append(item)
 
     return dict(groups)
+
+
+def corpus_status(data):
+    """Return ``partial`` and ``completeness`` of the corpus a report is built on.
+
+    Both are set on corpora built against a deadline, see
+    ``related_works.Corpus``. Other corpora are complete.
+    """
+    return getattr(data, "partial", False), getattr(data, "completeness", None)
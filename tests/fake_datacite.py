@@ -0,0 +1,115 @@
+# fake_datacite.py
+import json
+import re
+import time
+
+from datacitekit.extractors import extract_doi
+from datacitekit.searchers import Deadline
+from datacitekit.transport import TransportResponse
+
+UPDATED_CLAUSE = re.compile(r'updated:\["([^"]+)" TO \*\]')
+QUOTED_DOI = re.compile(r'"(?:https?://doi\.org/)?(10\.[^"]+)"')
+
+
+def record(doi, resource_type="Dataset", updated="2024-01-01", related=()):
+    """A DataCite record relating to ``related`` (DOI, relation type) pairs."""
+    return {
+        "id": doi,
+        "type": "dois",
+        "attributes": {
+            "doi": doi,
+            "types": {"resourceTypeGeneral": resource_type},
+            "updated": updated,
+            "relatedIdentifiers": [
+                {
+                    "relatedIdentifier": related_doi,
+                    "relatedIdentifierType": "DOI",
+                    "relationType": relation_type,
+                }
+                for related_doi, relation_type in related
+            ],
+        },
+    }
+
+
+class FakeDataCite:
+    """In-memory DataCite API answering searcher requests as a transport.
+
+    Understands the DOI queries of ``DoiSearcher``, the ``ids`` of
+    ``DoiListSearcher`` and the ``updated`` clause of delta searches.
+    Records are returned in DOI order. ``fail`` maps page numbers to the
+    HTTP status returned for them, and every response after the first
+    ``slow_after`` takes ``latency`` seconds.
+    """
+
+    rate_limited = False
+
+    def __init__(self, records=()):
+        self.records = {}
+        self.requests = []
+        self.fail = {}
+        self.latency = 0.0
+        self.slow_after = 0
+        for raw in records:
+            self.put(raw)
+
+    def put(self, raw):
+        self.records[raw["id"]] = raw
+
+    def delete(self, doi):
+        del self.records[doi]
+
+    def _matches(self, raw, params):
+        attributes = raw["attributes"]
+        query = params.get("query", "")
+        updated = UPDATED_CLAUSE.search(query)
+        if updated and attributes["updated"] < updated.group(1):
+            return False
+        if "ids" in params:
+            return raw["id"] in params["ids"].split(",")
+        dois = QUOTED_DOI.findall(UPDATED_CLAUSE.sub("", query))
+        if not dois:
+            return True
+        related_dois = {
+            extract_doi(related["relatedIdentifier"])
+            for related in attributes["relatedIdentifiers"]
+        }
+        return raw["id"] == dois[0] or dois[0] in related_dois
+
+    def get(self, url, params=None, timeout=None):
+        latency = self.latency if len(self.requests) >= self.slow_after else 0.0
+        if timeout is not None and latency > timeout:
+            time.sleep(timeout)
+            raise TimeoutError(f"No response from {url} in {timeout}s")
+        time.sleep(latency)
+        self.requests.append(params)
+        page = params["page[number]"]
+        if page in self.fail:
+            return TransportResponse(self.fail[page], b"{}")
+        matches = [
+            raw
+            for _, raw in sorted(self.records.items())
+            if self._matches(raw, params)
+        ]
+        size = params["page[size]"]
+        content = {
+            "data": matches[(page - 1) * size : page * size],
+            "meta": {"total": len(matches), "totalPages": -(-len(matches) // size)},
+        }
+        return TransportResponse(200, json.dumps(content).encode())
+
+    def close(self):
+        pass
+
+
+class RequestCountDeadline(Deadline):
+    """Expires once the fake API has answered ``requests`` requests."""
+
+    def __init__(self, api, requests):
+        super().__init__(60)
+        self.api = api
+        self.requests = requests
+
+    @property
+    def expired(self):
+        return len(self.api.requests) >= self.requests
@@ -0,0 +1,64 @@
+# test_cli.py
+import io
+import json
+
+import pytest
+
+from datacitekit import cli
+from datacitekit.cli import BatchRun, Checkpoint, iter_dois
+
+
+@pytest.fixture
+def failing(monkeypatch):
+    """DOIs ``build_reports`` fails for, reports are just the DOI otherwise."""
+    failing = set()
+
+    def build_reports(doi, **options):
+        if doi in failing:
+            raise LookupError("DOI not found")
+        return {"doi": doi}
+
+    monkeypatch.setattr(cli, "build_reports", build_reports)
+    return failing
+
+
+def run(dois, checkpoint):
+    output, errors = io.StringIO(), io.StringIO()
+    stats = BatchRun(
+        output, errors=errors, workers=2, checkpoint=checkpoint, progress=io.StringIO()
+    ).run(dois)
+    lines = [json.loads(line) for line in output.getvalue().splitlines()]
+    error_lines = [json.loads(line) for line in errors.getvalue().splitlines()]
+    return stats, lines, error_lines
+
+
+def test_iter_dois():
+    assert list(iter_dois(["10.1000/a\n", "\n", "# comment\n", " 10.1000/b "])) == [
+        "10.1000/a",
+        "10.1000/b",
+    ]
+
+
+def test_batch_run_resumes_and_retries_errors(tmp_path, failing):
+    path = tmp_path / "done.txt"
+    path.write_text("10.1000/a\n")
+    failing.add("10.1000/c")
+
+    checkpoint = Checkpoint(path)
+    stats, lines, errors = run(
+        ["10.1000/a", "10.1000/b", "10.1000/b", "10.1000/c"], checkpoint
+    )
+    checkpoint.close()
+    assert stats == {"done": 1, "errors": 1, "skipped": 2}
+    assert lines == [{"doi": "10.1000/b"}]
+    assert errors == [{"doi": "10.1000/c", "error": "LookupError: DOI not found"}]
+    assert path.read_text().split() == ["10.1000/a", "10.1000/b"]
+
+    # The next run only retries the DOI that failed
+    failing.clear()
+    checkpoint = Checkpoint(path)
+    stats, lines, errors = run(["10.1000/a", "10.1000/b", "10.1000/c"], checkpoint)
+    checkpoint.close()
+    assert stats == {"done": 1, "skipped": 2}
+    assert lines == [{"doi": "10.1000/c"}]
+    assert errors == []
@@ -0,0 +1,44 @@
+# test_distinct.py
+from datacitekit.distinct import (
+    HyperLogLog,
+    IdentifierInterner,
+    IdSet,
+    identifier_hash,
+)
+
+
+def test_identifier_interner():
+    interner = IdentifierInterner()
+    assert interner.intern_all(["a", "b", "a"]) == [0, 1, 0]
+    assert len(interner) == 2
+
+
+def test_id_set():
+    ids = IdSet([3, 17, 3, 0])
+    assert len(ids) == 3
+    assert 17 in ids and 4 not in ids and 1000 not in ids
+    assert list(ids) == [0, 3, 17]
+    ids.merge(IdSet([17, 64]))
+    assert list(ids) == [0, 3, 17, 64]
+    assert len(ids) == 4
+
+
+def test_hyperloglog_estimate():
+    counter = HyperLogLog()
+    counter.update(f"0000-0000-0000-{i:04d}" for i in range(5000))
+    counter.update(f"0000-0000-0000-{i:04d}" for i in range(2500))
+    assert abs(len(counter) - 5000) < 5000 * 0.03
+
+    other = HyperLogLog()
+    other.update(f"https://ror.org/0{i:08d}" for i in range(1000))
+    counter.merge(other)
+    assert abs(len(counter) - 6000) < 6000 * 0.03
+
+
+def test_hyperloglog_counts_hashes_like_identifiers():
+    identifiers = [f"0000-0000-0000-{i:04d}" for i in range(100)]
+    counter = HyperLogLog()
+    counter.update(identifiers)
+    hashed = HyperLogLog()
+    hashed.update_hashes(map(identifier_hash, identifiers))
+    assert hashed._registers == counter._registers
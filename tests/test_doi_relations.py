@@ -0,0 +1,94 @@
+# test_doi_relations.py
+import pytest
+
+from datacitekit.doi_relations import DoiRelationRelatonsReport, relation_dispatch
+from datacitekit.utils import resource_type_label
+
+
+def test_relation_dispatch():
+    assert relation_dispatch("IsCitedBy") == ("citations", "references", False)
+    assert relation_dispatch("Cites") == ("references", "citations", True)
+    assert relation_dispatch("is-cited-by") == relation_dispatch("IsCitedBy")
+    assert relation_dispatch("isCitedBy") == relation_dispatch("IsCitedBy")
+    assert relation_dispatch("Unknown") is None
+
+
+def test_resource_type_label():
+    assert resource_type_label("JournalArticle") == "Journal Article"
+    assert resource_type_label("ComputationalNotebook") == "Computational Notebook"
+    assert resource_type_label("NotInTheVocabulary") == "Not In The Vocabulary"
+
+
+def test_source_target_format_counts_skipped_edges():
+    data = {
+        "10.1000/a": {
+            "related_identifiers": [
+                {"relatedIdentifier": "10.1000/b", "relationType": "Cites"},
+                {"relatedIdentifier": "10.1000/b", "relationType": "Unknown"},
+            ]
+        },
+        "10.1000/b": {},
+    }
+    report = DoiRelationRelatonsReport(data)
+    assert report.source_target_format == [
+        {
+            "source_doi": "10.1000/a",
+            "target_doi": "10.1000/b",
+            "source_relation_type_id": "references",
+            "target_relation_type_id": "citations",
+        }
+    ]
+    assert report.warning_counts["unhandled_relation_type"] == 1
+    assert report.unhandled_relation_types == {"Unknown": 1}
+
+    missing = {"related_doi": None, "relation_type": "Cites"}
+    connections = [{"doi": "10.1000/a", "connections": [missing]}]
+    report = DoiRelationRelatonsReport(data, connections=connections)
+    assert report.source_target_format == []
+    assert report.warning_counts == {"missing_id": 1}
+
+
+def test_relation_view():
+    data = {
+        "10.1000/a": {
+            "related_identifiers": [
+                {"relatedIdentifier": "10.1000/b", "relationType": "Cites"},
+                {"relatedIdentifier": "10.1000/c", "relationType": "Cites"},
+            ]
+        },
+        "10.1000/b": {},
+        "10.1000/c": {},
+        "10.1000/d": {
+            "related_identifiers": [
+                {"relatedIdentifier": "10.1000/a", "relationType": "HasPart"},
+            ]
+        },
+    }
+    report = DoiRelationRelatonsReport(data)
+    view = report.relation_view("10.1000/a")
+    assert view.counts() == {"references": 2, "part_of": 1}
+    assert view.slice("references", 1, 5) == ["10.1000/c"]
+    with pytest.raises(ValueError):
+        view.slice("references", -1, 1)
+    with pytest.raises(ValueError):
+        view.slice("references", 0, -1)
+    assert view.top("references", 1, key=lambda doi: doi[-1] != "c") == ["10.1000/c"]
+    assert view.as_dict() == report.relations_to_doi("10.1000/a")
+    assert report.relation_view("10.1000/x").counts() == {}
+
+
+def test_relation_view_of_a_high_degree_doi():
+    data = {"10.1000/root": {}}
+    for number in range(5000):
+        data[f"10.1000/{number}"] = {
+            "related_identifiers": [
+                {"relatedIdentifier": "10.1000/root", "relationType": "Cites"}
+            ]
+        }
+    report = DoiRelationRelatonsReport(data)
+    view = report.relation_view("10.1000/root")
+    assert view.counts() == {"citations": 5000}
+    assert view.slice("citations", 4998) == ["10.1000/4998", "10.1000/4999"]
+    # Only the requested DOI is indexed, and its view is reused
+    assert list(report._relation_views) == ["10.1000/root"]
+    assert report.relation_view("10.1000/root") is view
@@ -0,0 +1,76 @@
+# test_graph_analytics.py
+import pytest
+
+from datacitekit.graph_analytics import RelationGraph
+
+pytest.importorskip("numpy")
+
+
+def edge(source, target, relation_type):
+    return {
+        "source_doi": source,
+        "target_doi": target,
+        "source_relation_type_id": relation_type,
+        "target_relation_type_id": relation_type,
+    }
+
+
+EDGES = [
+    edge("a", "b", "references"),
+    # Recorded on both DOIs, counted once
+    edge("a", "b", "references"),
+    edge("b", "c", "citations"),
+    edge("a", "c", "parts"),
+    edge("d", "e", "versions"),
+]
+
+
+@pytest.fixture
+def graph():
+    return RelationGraph(EDGES, dois=["a", "b", "c", "d", "e", "f"])
+
+
+def test_degrees(graph):
+    assert graph.dois == ["a", "b", "c", "d", "e", "f"]
+    assert list(graph.out_degree()) == [2, 1, 0, 1, 0, 0]
+    assert graph.as_dict(graph.in_degree())["c"] == 2
+    assert list(graph.in_degree()) == [0, 1, 2, 0, 1, 0]
+    assert list(graph.out_degree("citations")) == [1, 1, 0, 0, 0, 0]
+    assert list(graph.in_degree("parts")) == [0, 0, 1, 0, 0, 0]
+
+
+def test_connected_components(graph):
+    assert list(graph.connected_components()) == [0, 0, 0, 1, 1, 2]
+    assert list(graph.connected_components("citations")) == [0, 0, 0, 1, 2, 3]
+
+
+def test_k_hop_reachability(graph):
+    assert graph.k_hop_reachability(["a"], 1) == {"a": 0, "b": 1, "c": 1}
+    assert graph.k_hop_reachability(["c"], 2, "citations", direction="in") == {
+        "c": 0,
+        "b": 1,
+        "a": 2,
+    }
+    assert graph.k_hop_reachability(["c"], 1, "citations", direction="in") == {
+        "c": 0,
+        "b": 1,
+    }
+    assert graph.k_hop_reachability(["e"], 3, direction="both") == {"e": 0, "d": 1}
+    assert graph.k_hop_reachability(["unknown"], 2) == {}
+
+
+def test_pagerank(graph):
+    rank = graph.as_dict(graph.pagerank())
+    assert sum(rank.values()) == pytest.approx(1)
+    assert rank["c"] > rank["b"] > rank["a"]
+    assert rank["e"] > rank["d"]
+    assert rank["a"] == pytest.approx(rank["d"]) == pytest.approx(rank["f"])
+
+
+def test_empty_graph():
+    graph = RelationGraph([])
+    assert graph.size == 0
+    assert len(graph.out_degree()) == len(graph.in_degree()) == 0
+    assert len(graph.connected_components()) == 0
+    assert len(graph.pagerank()) == 0
+    assert graph.k_hop_reachability(["a"], 2) == {}
@@ -0,0 +1,53 @@
+# test_local_store.py
+import gzip
+import json
+
+import pytest
+
+from datacitekit.local_store import LocalStore
+from datacitekit.searchers import DataCiteSearcher, DoiListSearcher, DoiSearcher
+
+
+def record(doi, *related_dois):
+    return {
+        "id": doi,
+        "type": "dois",
+        "attributes": {
+            "doi": doi,
+            "types": {"resourceTypeGeneral": "Dataset"},
+            "relatedIdentifiers": [
+                {"relatedIdentifier": related_doi, "relationType": "Cites"}
+                for related_doi in related_dois
+            ],
+            "titles": [{"title": "Not stored"}],
+        },
+    }
+
+
+def test_ingest_and_search(tmp_path):
+    with gzip.open(tmp_path / "part-1.jsonl.gz", "wt") as dump:
+        dump.write(json.dumps(record("10.1000/a", "https://doi.org/10.1000/B")) + "\n")
+        dump.write(json.dumps(record("10.1000/b")) + "\n")
+    with open(tmp_path / "part-2.json", "w") as dump:
+        json.dump({"data": [record("10.1000/c", "10.1000/b", "10.1000/a")]}, dump)
+
+    store = LocalStore(str(tmp_path / "datacite.db"))
+    assert store.ingest([tmp_path / "part-1.jsonl.gz", tmp_path / "part-2.json"]) == 3
+
+    incoming = DoiSearcher("10.1000/b", local_store=store).search()
+    assert [r["id"] for r in incoming] == ["10.1000/a", "10.1000/b", "10.1000/c"]
+    assert "titles" not in incoming[0]["attributes"]
+
+    found = DoiListSearcher(["10.1000/c", "10.1000/x"], local_store=store).search()
+    assert [r["id"] for r in found] == ["10.1000/c"]
+
+    # Ingesting a record again replaces its links
+    store.add_records([record("10.1000/a")])
+    incoming = DoiSearcher("10.1000/b", local_store=store).search()
+    assert [r["id"] for r in incoming] == ["10.1000/b", "10.1000/c"]
+
+
+def test_only_doi_searches_use_a_local_store(tmp_path):
+    store = LocalStore(str(tmp_path / "datacite.db"))
+    with pytest.raises(ValueError):
+        DataCiteSearcher(query="climate", local_store=store)
@@ -0,0 +1,112 @@
+# test_rate_limit.py
+import threading
+
+import pytest
+
+from datacitekit.rate_limit import (
+    AdaptiveConcurrency,
+    RateLimiter,
+    SqliteTokenBucket,
+    TokenBucket,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def test_token_bucket_refills_at_its_rate(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(TokenBucket, "_now", staticmethod(clock))
+    monkeypatch.setattr("datacitekit.rate_limit.time.sleep", clock.sleep)
+    bucket = TokenBucket(rate=2, capacity=2)
+    assert bucket.try_acquire() and bucket.try_acquire()
+    assert not bucket.try_acquire()
+    clock.now += 0.25
+    assert not bucket.try_acquire()
+    clock.now += 0.25
+    assert bucket.try_acquire()
+
+    # Blocks for exactly the time it takes to refill the missing tokens
+    started = clock.now
+    bucket.acquire(2)
+    assert clock.now - started == 1.0
+
+    # Never holds more than its capacity
+    clock.now += 60
+    assert bucket.try_acquire(2)
+    assert not bucket.try_acquire()
+
+
+def test_sqlite_token_bucket_is_shared(tmp_path):
+    path = tmp_path / "buckets.sqlite"
+    first = SqliteTokenBucket(path, rate=0.001, capacity=2)
+    second = SqliteTokenBucket(path, rate=0.001, capacity=2)
+    other = SqliteTokenBucket(path, rate=0.001, capacity=1, name="other")
+    assert first.try_acquire()
+    assert second.try_acquire()
+    assert not first.try_acquire()
+    assert not second.try_acquire()
+    assert other.try_acquire()
+
+
+def test_429_pauses_the_bucket(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(TokenBucket, "_now", staticmethod(clock))
+    limiter = RateLimiter(bucket=TokenBucket(rate=1, capacity=1))
+    with limiter.request() as slot:
+        slot.record(429, retry_after=5)
+    assert limiter.concurrency.limit == 2
+    clock.now += 5.5
+    assert not limiter.bucket.try_acquire()
+    clock.now += 0.5
+    assert limiter.bucket.try_acquire()
+
+
+def test_adaptive_concurrency_grows_and_shrinks():
+    concurrency = AdaptiveConcurrency(initial=2, minimum=1, maximum=3)
+    for _ in range(10):
+        concurrency.record(200, 0.1)
+    assert concurrency.limit == 3
+    concurrency.record(200, 0.5)
+    assert concurrency.limit == 3 * 0.9
+    concurrency.record(503, 0.1)
+    assert concurrency.limit == 3 * 0.9 * 0.9
+    concurrency.record(429, 0.1)
+    concurrency.record(429, 0.1)
+    assert concurrency.limit == 1
+
+
+def test_adaptive_concurrency_blocks_at_the_limit():
+    concurrency = AdaptiveConcurrency(initial=1)
+    concurrency.acquire()
+    acquired = threading.Event()
+
+    def second_request():
+        concurrency.acquire()
+        acquired.set()
+
+    thread = threading.Thread(target=second_request)
+    thread.start()
+    assert not acquired.wait(0.05)
+    concurrency.release()
+    assert acquired.wait(5)
+    thread.join()
+
+
+def test_request_gives_up_when_no_token_arrives_in_time():
+    limiter = RateLimiter(bucket=TokenBucket(rate=0.01, capacity=1))
+    with limiter.request(timeout=1):
+        pass
+    with pytest.raises(TimeoutError):
+        with limiter.request(timeout=1):
+            pass
+    # The concurrency slot was released, only the token is missing
+    assert limiter.concurrency.acquire(timeout=0)
@@ -0,0 +1,138 @@
+# test_refresh.py
+import threading
+import time
+
+import pytest
+
+from datacitekit.refresh import RefreshScheduler
+
+
+class Loader:
+    """Returns ``key:n`` on the n-th load of a key, blocking while ``gate`` is set."""
+
+    def __init__(self):
+        self.loads = []
+        self.gate = None
+
+    def __call__(self, key):
+        if self.gate is not None:
+            self.gate.wait(5)
+        self.loads.append(key)
+        return f"{key}:{self.loads.count(key)}"
+
+
+def scheduler(loader, **options):
+    clock = [0.0]
+    refresh_scheduler = RefreshScheduler(loader, ttl=100, grace=10, **options)
+    refresh_scheduler._now = lambda: clock[0]
+    return refresh_scheduler, clock
+
+
+def wait_for(predicate):
+    deadline = time.monotonic() + 5
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def test_fresh_stale_and_cold():
+    loader = Loader()
+    cache, clock = scheduler(loader)
+    assert cache.get("a") == "a:1"
+    clock[0] = 99
+    assert cache.get("a") == "a:1"
+    assert cache.stats == {"cold": 1, "fresh": 1}
+
+    # Stale values are served while a refresh runs in the background
+    clock[0] = 105
+    assert cache.get("a") == "a:1"
+    wait_for(lambda: cache.get("a") == "a:2")
+    assert cache.stats["stale"] >= 1 and cache.stats["refreshes"] == 1
+
+    # Past the grace window the caller waits for the load
+    clock[0] = 105 + 111
+    assert cache.get("a") == "a:3"
+    assert cache.stats["cold"] == 2
+
+
+def test_cold_loads_are_coalesced():
+    loader = Loader()
+    loader.gate = threading.Event()
+    cache, _ = scheduler(loader)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get("a")))
+        for _ in range(3)
+    ]
+    for thread in threads:
+        thread.start()
+    wait_for(lambda: cache.stats["cold"] == 3)
+    loader.gate.set()
+    for thread in threads:
+        thread.join()
+    assert results == ["a:1"] * 3
+    assert loader.loads == ["a"]
+
+
+def test_refreshes_are_capped_and_not_blocked_by_cold_loads():
+    loader = Loader()
+    cache, clock = scheduler(loader, max_concurrent_refreshes=1)
+    cache.get("a")
+    cache.get("b")
+    loader.gate = threading.Event()
+    # A cold load in flight on another thread
+    cold = threading.Thread(target=cache.get, args=("c",))
+    cold.start()
+    wait_for(lambda: cache.stats["cold"] == 3)
+
+    clock[0] = 105
+    cache.get("a")
+    cache.get("b")
+    assert cache.stats["refreshes"] == 1
+    loader.gate.set()
+    cold.join()
+    wait_for(lambda: loader.loads.count("a") == 2)
+
+
+def test_tick_refreshes_hot_keys_and_drops_expired_entries():
+    loader = Loader()
+    cache, clock = scheduler(loader, hot_keys=1)
+    for _ in range(3):
+        cache.get("hot")
+    cache.get("cold")
+    clock[0] = 80
+    cache.tick()
+    wait_for(lambda: cache._entries["hot"].value == "hot:2")
+    assert loader.loads.count("cold") == 1
+    assert cache.access_counts == {"hot": 1}
+
+    clock[0] = 111
+    cache.tick()
+    assert cache.stats["expired"] == 1
+    assert "cold" not in cache._entries and "hot" in cache._entries
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache, _ = scheduler(Loader(), max_entries=2)
+    cache.get("a")
+    cache.get("b")
+    cache.get("a")
+    cache.get("c")
+    assert list(cache._entries) == ["a", "c"]
+    assert cache.stats["evicted"] == 1
+
+
+def test_loader_errors_are_not_cached():
+    registered = set()
+
+    def loader(key):
+        if key not in registered:
+            raise LookupError(key)
+        return key
+
+    cache, _ = scheduler(loader)
+    with pytest.raises(LookupError):
+        cache.get("new")
+    registered.add("new")
+    assert cache.get("new") == "new"
+    assert cache.stats["errors"] == 1
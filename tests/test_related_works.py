@@ -0,0 +1,99 @@
+# test_related_works.py
+import time
+
+from datacitekit.related_works import get_full_corpus_doi_attributes
+from datacitekit.resource_type_graph import RelatedWorkReports
+from datacitekit.searchers import Deadline
+
+from .fake_datacite import FakeDataCite, RequestCountDeadline, record
+
+ROOT = "10.1000/root"
+OUTGOING = [f"10.1000/out{number}" for number in range(3)]
+INCOMING = [f"10.1000/in{number}" for number in range(5)]
+
+
+def fake_api():
+    return FakeDataCite(
+        [record(ROOT, "Dataset", related=[(doi, "References") for doi in OUTGOING])]
+        + [record(doi, "Software") for doi in OUTGOING]
+        + [record(doi, related=[(ROOT, "Cites")]) for doi in INCOMING]
+    )
+
+
+def corpus(api, deadline):
+    return get_full_corpus_doi_attributes(
+        ROOT,
+        RelatedWorkReports.parser,
+        "api",
+        deadline=deadline,
+        transport=api,
+        page_size=2,
+    )
+
+
+def test_corpus_before_deadline_fetches_in_priority_order():
+    api = fake_api()
+    complete = corpus(api, 60)
+    requests = [(params.get("ids"), params["page[number]"]) for params in api.requests]
+    outgoing = ",".join(sorted(OUTGOING))
+    # Primary record, first incoming page, outgoing links, remaining pages
+    assert requests == [
+        (ROOT, 1),
+        (None, 1),
+        (outgoing, 1),
+        (outgoing, 2),
+        (None, 2),
+        (None, 3),
+    ]
+
+    expected = corpus(fake_api(), None)
+    assert complete == expected and list(complete) == list(expected)
+    assert not complete.partial
+    assert complete.completeness == {
+        "incoming": {
+            "pages_fetched": 3,
+            "total_pages": 3,
+            "records_fetched": 6,
+            "total_records": 6,
+        },
+        "outgoing": {
+            "pages_fetched": 2,
+            "total_pages": 2,
+            "records_fetched": 3,
+            "total_records": 3,
+        },
+    }
+
+
+def test_corpus_before_deadline_is_partial():
+    api = fake_api()
+    partial = corpus(api, RequestCountDeadline(api, 3))
+    assert partial.partial
+    assert set(partial) == {ROOT, *INCOMING[:2], *OUTGOING[:2]}
+    assert partial.completeness["incoming"]["pages_fetched"] == 1
+    assert partial.completeness["incoming"]["total_pages"] == 3
+    assert partial.completeness["outgoing"]["pages_fetched"] == 1
+    report = RelatedWorkReports(partial)
+    assert report.partial and report.completeness == partial.completeness
+
+
+def test_slow_page_is_abandoned_at_the_deadline():
+    api = fake_api()
+    api.latency = 0.2
+    api.slow_after = 1
+    partial = corpus(api, Deadline(0.1))
+    # The primary record arrived, the first incoming page was given up
+    assert list(partial) == [ROOT]
+    assert partial.partial
+    assert len(api.requests) == 1
+
+
+def test_corpus_is_empty_without_the_primary_record():
+    api = fake_api()
+    api.latency = 0.2
+    started = time.monotonic()
+    partial = corpus(api, Deadline(0.05))
+    assert time.monotonic() - started < 0.15
+    assert partial == {} and partial.partial
+    assert partial.completeness == {"incoming": None, "outgoing": None}
+    assert RelatedWorkReports(partial).partial
@@ -0,0 +1,60 @@
+# test_resource_type_graph.py
+import pytest
+
+from datacitekit.resource_type_graph import Aggregator, RelatedWorkReports
+
+DATA = {
+    "10.1000/a": {
+        "resourceTypeGeneral": "JournalArticle",
+        "related_identifiers": [
+            {"relatedIdentifier": "10.1000/b", "relationType": "References"},
+            {"relatedIdentifier": "10.1000/c", "relationType": "References"},
+            {"relatedIdentifier": "10.1000/missing", "relationType": "Cites"},
+        ],
+    },
+    "10.1000/b": {
+        "resourceTypeGeneral": "Dataset",
+        "related_identifiers": [
+            {
+                "relatedIdentifier": "https://doi.org/10.1000/a",
+                "relationType": "IsCitedBy",
+            },
+            {"relatedIdentifier": "10.1000/c", "relationType": "HasPart"},
+        ],
+    },
+    "10.1000/c": {"resourceTypeGeneral": "Text", "resourceType": "Project"},
+    "10.1000/d": {"resourceTypeGeneral": "Dataset"},
+}
+
+
+def test_reports():
+    report = RelatedWorkReports(DATA)
+    assert report.aggregate_counts == [
+        {"title": "Journal Article", "count": 1},
+        {"title": "Dataset", "count": 2},
+        {"title": "Project", "count": 1},
+    ]
+    assert report.type_connection_report == [
+        {"source": "Journal Article", "target": "Dataset", "count": 1},
+        {"source": "Journal Article", "target": "Project", "count": 1},
+        {"source": "Dataset", "target": "Journal Article", "count": 1},
+        {"source": "Dataset", "target": "Project", "count": 1},
+    ]
+
+
+def test_numpy_backend_matches_python_backend():
+    pytest.importorskip("numpy")
+    python_report = RelatedWorkReports(DATA)
+    numpy_report = RelatedWorkReports(DATA, backend="numpy")
+    assert numpy_report.aggregate_counts == python_report.aggregate_counts
+    assert numpy_report.type_connection_report == python_report.type_connection_report
+
+    # Connections built without codes are encoded by the aggregator
+    aggregator = Aggregator(python_report.base_connections, "numpy")
+    assert aggregator.type_counts == python_report.aggregator.type_counts
+    assert aggregator.type_connections == python_report.aggregator.type_connections
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        RelatedWorkReports(DATA, backend="fortran")
@@ -0,0 +1,116 @@
+# test_searchers.py
+import time
+
+import pytest
+
+from datacitekit.searchers import AdaptivePageSize, Deadline, DoiSearcher, SearchError
+
+from .fake_datacite import FakeDataCite, RequestCountDeadline, record
+
+
+def test_adaptive_page_size_stays_aligned():
+    sizer = AdaptivePageSize(100)
+    assert sizer.sizes == [25, 50, 100, 200, 400, 800]
+    offset, total = 100, 5000
+    while offset < total:
+        size = sizer.next_size(offset, total)
+        assert offset % size == 0
+        offset += size
+    assert offset == total
+
+
+def test_adaptive_page_size_follows_total_and_cost():
+    sizer = AdaptivePageSize(100)
+    assert sizer.next_size(100, 120) == 25
+    assert sizer.next_size(800, 10000) == 800
+    sizer.observe(100, latency=1.0, payload_bytes=100_000)
+    assert sizer.next_size(800, 10000) == 200
+
+
+def test_search_stops_at_deadline():
+    searcher = DoiSearcher("10.1000/a", deadline=Deadline(0))
+    assert searcher.search() == []
+    assert searcher.partial
+    assert searcher.completeness["pages_fetched"] == 0
+
+
+def test_failed_page_is_not_dropped():
+    api = FakeDataCite(
+        record(f"10.1000/{number}", related=[("10.1000/a", "Cites")])
+        for number in range(5)
+    )
+    api.fail[2] = 429
+    searcher = DoiSearcher("10.1000/a", page_size=2, transport=api)
+    with pytest.raises(SearchError, match="Page 2 .* HTTP 429 after retries"):
+        searcher.search()
+    assert searcher.completeness["pages_fetched"] == 1
+    # The page was retried before giving up
+    assert [params["page[number]"] for params in api.requests] == [1, 2, 2, 2, 2]
+
+
+def adaptive_api(size=3000):
+    return FakeDataCite(
+        record(f"10.1000/{number:05d}", related=[("10.1000/a", "Cites")])
+        for number in range(size)
+    )
+
+
+def test_adaptive_search_fetches_every_record_once():
+    api = adaptive_api()
+    searcher = DoiSearcher("10.1000/a", page_size=100, adaptive=True, transport=api)
+    records = searcher.iter_search()
+    next(records)
+    # The next page is requested while the first one is being used
+    started = time.monotonic()
+    while len(api.requests) < 2:
+        assert time.monotonic() - started < 5
+        time.sleep(0.001)
+    dois = ["10.1000/00000"] + [raw["id"] for raw in records]
+    assert dois == sorted(api.records)
+
+    # Pages grow while each one starts where the previous one ended
+    pages = [(params["page[number]"], params["page[size]"]) for params in api.requests]
+    assert pages == [
+        (1, 100),
+        (2, 100),
+        (2, 200),
+        (2, 400),
+        (2, 800),
+        (3, 800),
+        (4, 800),
+    ]
+    offset = 0
+    for number, size in pages:
+        assert (number - 1) * size == offset
+        offset += size
+    assert searcher.completeness == {
+        "pages_fetched": 7,
+        "total_pages": 7,
+        "records_fetched": 3000,
+        "total_records": 3000,
+    }
+    assert not searcher.partial
+
+
+def test_adaptive_search_raises_on_failed_page():
+    api = adaptive_api()
+    api.fail[3] = 500
+    searcher = DoiSearcher("10.1000/a", page_size=100, adaptive=True, transport=api)
+    with pytest.raises(SearchError, match="Page 3 .* HTTP 500"):
+        searcher.search()
+
+
+def test_adaptive_search_stops_at_deadline():
+    api = adaptive_api()
+    searcher = DoiSearcher(
+        "10.1000/a",
+        page_size=100,
+        adaptive=True,
+        transport=api,
+        deadline=RequestCountDeadline(api, 3),
+    )
+    assert len(searcher.search()) == 100 + 100 + 200
+    assert searcher.partial
+    assert searcher.completeness["pages_fetched"] == 3
+    assert searcher.completeness["records_fetched"] == 400
+    assert searcher.completeness["total_records"] == 3000
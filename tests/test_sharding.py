@@ -0,0 +1,74 @@
+# test_sharding.py
+import pytest
+
+from datacitekit.doi_relations import DoiRelationRelatonsReport
+from datacitekit.resource_people_organization_graph import (
+    RelatedWorkWithPeopleOrgsReport,
+)
+from datacitekit.resource_type_graph import RelatedWorkReports
+from datacitekit.sharding import ShardedCorpus, shard_bounds
+
+RESOURCE_TYPES = ["JournalArticle", "Dataset", "Software", "Text"]
+RELATION_TYPES = ["Cites", "IsCitedBy", "HasPart", "IsSupplementTo", "Unknown"]
+
+
+def entry(number):
+    return {
+        "doi": f"10.1000/{number}",
+        "resourceTypeGeneral": RESOURCE_TYPES[number % 4],
+        "resourceType": "Project" if number % 7 == 0 else "",
+        "creator_orcid_ids": [f"0000-0000-0000-{number % 5:04d}"],
+        "contributor_orcid_ids": [f"0000-0000-0001-{number % 3:04d}"],
+        "creator_affiliation_ror_ids": [f"https://ror.org/0{number % 4}"],
+        "related_identifiers": [
+            {
+                "relatedIdentifier": f"10.1000/{(number * 3 + step) % 25}",
+                "relationType": RELATION_TYPES[(number + step) % 5],
+            }
+            for step in range(number % 4)
+        ]
+        + [{"relatedIdentifier": "10.1000/outside", "relationType": "Cites"}],
+    }
+
+
+DATA = {f"10.1000/{number}": entry(number) for number in range(20)}
+
+
+def test_shard_bounds():
+    assert shard_bounds(10, 3) == [(0, 4), (4, 7), (7, 10)]
+    assert shard_bounds(2, 4) == [(0, 1), (1, 2)]
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_sharded_reports_match_single_process_reports(processes):
+    sharded = ShardedCorpus(DATA, processes=processes, shards=3, people_orgs=True)
+
+    reports = sharded.related_work_reports()
+    expected = RelatedWorkReports(DATA)
+    assert reports.aggregate_counts == expected.aggregate_counts
+    assert reports.type_connection_report == expected.type_connection_report
+
+    for distinct in ("exact", "approximate"):
+        people_orgs = sharded.people_orgs_report(distinct)
+        expected = RelatedWorkWithPeopleOrgsReport(DATA, distinct)
+        assert people_orgs.aggregate_counts == expected.aggregate_counts
+        assert people_orgs.type_connection_report == expected.type_connection_report
+        # People and orgs are counted, not kept with the connections
+        assert not any(
+            "orcid_ids" in connection or "ror_ids" in connection
+            for connection in expected.base_connections
+        )
+
+    relations = sharded.relation_report()
+    expected = DoiRelationRelatonsReport(DATA)
+    assert relations.source_target_format == expected.source_target_format
+    assert relations.warning_counts == expected.warning_counts
+    assert relations.unhandled_relation_types == expected.unhandled_relation_types
+    assert relations.warning_counts["unhandled_relation_type"] > 0
+    for doi in DATA:
+        assert relations.relations_to_doi(doi) == expected.relations_to_doi(doi)
+
+
+def test_people_orgs_report_needs_people_orgs():
+    with pytest.raises(ValueError):
+        ShardedCorpus(DATA, processes=1).people_orgs_report()
@@ -0,0 +1,48 @@
+# test_streaming.py
+from datacitekit.doi_relations import DoiRelationRelatonsReport
+from datacitekit.resource_type_graph import RelatedWorkReports
+from datacitekit.streaming import StreamingReportBuilder
+
+
+def record(doi, resource_type_general, *related):
+    return {
+        "id": doi,
+        "attributes": {
+            "doi": doi,
+            "types": {"resourceTypeGeneral": resource_type_general},
+            "relatedIdentifiers": [
+                {"relatedIdentifier": related_doi, "relationType": relation_type}
+                for related_doi, relation_type in related
+            ],
+        },
+    }
+
+
+RECORDS = [
+    record("10.1000/a", "JournalArticle", ("10.1000/b", "References")),
+    record("10.1000/b", "Dataset", ("10.1000/a", "IsReferencedBy")),
+    record("10.1000/c", "Software", ("10.1000/a", "Cites"), ("10.1000/x", "Cites")),
+    # Arrives again, as outgoing links can repeat incoming ones
+    record("10.1000/b", "Text", ("10.1000/c", "IsPartOf")),
+]
+
+
+def test_streaming_reports_match_batch_reports():
+    builder = StreamingReportBuilder()
+    builder.consume(RECORDS[:3])
+    assert builder.type_counts["Dataset"] == 1
+    assert builder.pending_edge_count == 1
+    builder.add(RECORDS[3])
+    assert "Dataset" not in builder.type_counts
+
+    data = {}
+    for raw in RECORDS:
+        data[raw["id"]] = RelatedWorkReports.parser(raw)
+    batch = RelatedWorkReports(data)
+    streamed = builder.related_work_reports()
+    assert streamed.aggregate_counts == batch.aggregate_counts
+    assert streamed.type_connection_report == batch.type_connection_report
+    assert (
+        builder.relation_report().relations_to_doi("10.1000/a")
+        == DoiRelationRelatonsReport(data).relations_to_doi("10.1000/a")
+    )
@@ -0,0 +1,110 @@
+# test_sync.py
+from datacitekit.related_works import get_full_corpus_doi_attributes
+from datacitekit.resource_type_graph import RelatedWorkReports
+from datacitekit.searchers import DEFAULT_FIELDS
+from datacitekit.sync import CorpusSync
+
+from .fake_datacite import FakeDataCite, record
+
+ROOT = "10.1000/root"
+
+
+def incoming(doi, updated="2024-01-01", resource_type="JournalArticle"):
+    return record(doi, resource_type, updated, [(ROOT, "Cites")])
+
+
+def primary(updated, *outgoing_dois):
+    return record(
+        ROOT, "Dataset", updated, [(doi, "References") for doi in outgoing_dois]
+    )
+
+
+def sorted_reports(reports):
+    return (
+        sorted(map(sorted, (node.items() for node in reports.aggregate_counts))),
+        sorted(map(sorted, (edge.items() for edge in reports.type_connection_report))),
+    )
+
+
+def assert_in_sync(corpus_sync, api):
+    options = {"transport": api, "page_size": 2}
+    expected = get_full_corpus_doi_attributes(
+        ROOT, RelatedWorkReports.parser, "api", **options
+    )
+    assert corpus_sync.corpus == expected
+    assert sorted_reports(corpus_sync.related_work_reports()) == sorted_reports(
+        RelatedWorkReports(expected)
+    )
+
+
+def test_sync_merges_changes():
+    api = FakeDataCite(
+        [
+            primary("2024-01-01", "10.1000/o1", "10.1000/o2"),
+            record("10.1000/o1", "Software"),
+            record("10.1000/o2", "Text"),
+            incoming("10.1000/i1"),
+            incoming("10.1000/i2"),
+        ]
+    )
+    corpus_sync = CorpusSync(ROOT, RelatedWorkReports.parser, "api", transport=api)
+    corpus_sync.sync()
+    assert set(corpus_sync.changes["added"]) == set(api.records)
+    assert_in_sync(corpus_sync, api)
+
+    # Nothing changed
+    corpus_sync.sync()
+    assert corpus_sync.changes == {"added": set(), "updated": set(), "removed": set()}
+
+    # A new incoming record, one that no longer links and a deleted one
+    api.put(incoming("10.1000/i3", "2024-02-01"))
+    api.put(record("10.1000/i1", "JournalArticle", "2024-02-01"))
+    api.delete("10.1000/i2")
+    corpus_sync.sync()
+    assert corpus_sync.changes == {
+        "added": {"10.1000/i3"},
+        "updated": set(),
+        "removed": {"10.1000/i1", "10.1000/i2"},
+    }
+    assert_in_sync(corpus_sync, api)
+
+    # The primary DOI changes its links and an outgoing record changes
+    api.put(primary("2024-03-01", "10.1000/o1", "10.1000/o3"))
+    api.put(record("10.1000/o3", "Image"))
+    api.put(record("10.1000/o1", "Dataset", "2024-03-01"))
+    corpus_sync.sync()
+    assert corpus_sync.changes == {
+        "added": {"10.1000/o3"},
+        "updated": {ROOT, "10.1000/o1"},
+        "removed": {"10.1000/o2"},
+    }
+    assert_in_sync(corpus_sync, api)
+
+
+def test_sync_fetches_records_the_delta_missed():
+    api = FakeDataCite([primary("2024-05-01"), incoming("10.1000/i1", "2024-05-01")])
+    corpus_sync = CorpusSync(ROOT, RelatedWorkReports.parser, "api", transport=api)
+    corpus_sync.sync()
+    # Indexed late, with an update time older than the watermark
+    api.put(incoming("10.1000/late", "2024-04-01"))
+    corpus_sync.sync()
+    assert corpus_sync.changes["added"] == {"10.1000/late"}
+    assert_in_sync(corpus_sync, api)
+
+
+def test_sync_requests_are_stable():
+    outgoing = [f"10.1000/o{number}" for number in range(9, 0, -1)]
+    api = FakeDataCite(
+        [primary("2024-01-01", *outgoing)] + [record(doi) for doi in outgoing]
+    )
+    # Searcher options given to the sync may include fields
+    corpus_sync = CorpusSync(
+        ROOT, RelatedWorkReports.parser, "api", transport=api, fields=DEFAULT_FIELDS
+    )
+    corpus_sync.sync()
+    api.delete("10.1000/o5")
+    corpus_sync.sync()
+    assert corpus_sync.changes["removed"] == {"10.1000/o5"}
+    ids = [params["ids"] for params in api.requests if "ids" in params]
+    assert ids and all(value == ",".join(sorted(outgoing)) for value in ids)
+    assert_in_sync(corpus_sync, api)
@@ -0,0 +1,134 @@
+# test_transport.py
+import json
+import threading
+
+import pytest
+
+from datacitekit.rate_limit import AdaptiveConcurrency, RateLimiter, TokenBucket
+from datacitekit.searchers import DoiSearcher
+from datacitekit.transport import (
+    HedgedTransport,
+    RecordingTransport,
+    ReplayTransport,
+    TransportResponse,
+)
+
+
+class PagedTransport:
+    rate_limited = False
+
+    def __init__(self, dois):
+        self.dois = dois
+        self.calls = 0
+
+    def get(self, url, params=None, timeout=None):
+        self.calls += 1
+        size = params["page[size]"]
+        start = (params["page[number]"] - 1) * size
+        page = [{"id": doi} for doi in self.dois[start : start + size]]
+        meta = {"total": len(self.dois), "totalPages": -(-len(self.dois) // size)}
+        return TransportResponse(200, json.dumps({"data": page, "meta": meta}).encode())
+
+    def close(self):
+        pass
+
+
+def test_record_and_replay(tmp_path):
+    path = tmp_path / "traffic.jsonl.gz"
+    dois = [f"10.1000/{number}" for number in range(5)]
+    live = PagedTransport(dois)
+    with RecordingTransport(path, inner=live) as transport:
+        recorded = DoiSearcher("10.1000/0", page_size=2, transport=transport).search()
+    assert live.calls == 3
+
+    replay = ReplayTransport(path)
+    replayed = DoiSearcher("10.1000/0", page_size=2, transport=replay).search()
+    assert replayed == recorded == [{"id": doi} for doi in dois]
+
+
+class StallingTransport:
+    """Answers at once, except for the first call after ``stall`` is set."""
+
+    rate_limited = True
+
+    def __init__(self):
+        self.stall = False
+        self.released = threading.Event()
+
+    def get(self, url, params=None, timeout=None):
+        if self.stall:
+            self.stall = False
+            self.released.wait(5)
+        return TransportResponse(200, b"{}")
+
+    def close(self):
+        self.released.set()
+
+
+def test_hedged_transport():
+    inner = StallingTransport()
+    limiter = RateLimiter(
+        bucket=TokenBucket(rate=0.001, capacity=1),
+        concurrency=AdaptiveConcurrency(initial=1),
+    )
+    transport = HedgedTransport(inner, budget=0.5, min_samples=5, rate_limiter=limiter)
+    for _ in range(10):
+        transport.get("url")
+    assert transport.stats["hedged"] == 0
+
+    inner.stall = True
+    assert transport.get("url").status_code == 200
+    assert transport.stats["hedged"] == transport.stats["hedge_wins"] == 1
+    assert transport.hedge_rate == 1 / 11
+
+    # The hedge took the only token and gave its slot back
+    inner.released.set()
+    stalled_get(transport, inner)
+    assert transport.stats["no_token"] == 1
+    assert limiter.concurrency.acquire(timeout=0)
+    # Without a free slot no hedge is sent either
+    stalled_get(transport, inner)
+    assert transport.stats["no_slot"] == 1
+    transport.close()
+
+
+def stalled_get(transport, inner, stall=0.05):
+    """Get through ``transport`` while the first inner call stalls ``stall``s."""
+    inner.released = threading.Event()
+    inner.stall = True
+    timer = threading.Timer(stall, inner.released.set)
+    timer.start()
+    try:
+        return transport.get("url")
+    finally:
+        timer.join()
+
+
+class FailingTransport(StallingTransport):
+    """Like ``StallingTransport``, but the stalled call fails."""
+
+    def get(self, url, params=None, timeout=None):
+        if self.stall:
+            self.stall = False
+            self.released.wait(5)
+            raise ConnectionError("reset")
+        if self.fail:
+            raise ConnectionError("refused")
+        return TransportResponse(200, b"{}")
+
+
+def test_hedged_transport_falls_back_on_the_request_that_succeeded():
+    inner = FailingTransport()
+    inner.fail = False
+    transport = HedgedTransport(inner, budget=1, min_samples=5, rate_limiter=None)
+    for _ in range(5):
+        transport.get("url")
+
+    assert stalled_get(transport, inner).status_code == 200
+    assert transport.stats["hedge_wins"] == 1
+
+    # Only raises once both requests failed
+    inner.fail = True
+    with pytest.raises(ConnectionError):
+        stalled_get(transport, inner)
+    transport.close()